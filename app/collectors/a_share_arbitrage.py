@@ -1,14 +1,12 @@
-import requests
 import time
-import random
 from app.core.db import save_data
+from app.core.jsl_session import jsl_request
 
 # Configuration
 # URL from browser subagent: https://www.jisilu.cn/data/taoligu/astock_arbitrage_list/
 API_URL = "https://www.jisilu.cn/data/taoligu/astock_arbitrage_list/"
+# Sent on top of the logged-in Jisilu session headers
 HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-    "X-Requested-With": "XMLHttpRequest",
     "Referer": "https://www.jisilu.cn/data/taoligu/#cna"
 }
 
@@ -16,11 +14,6 @@ def fetch_a_share_arbitrage():
     """Fetch A-share arbitrage data and return filtered list (Price < Cash Option Price)."""
     print(f"Fetching A-share arbitrage data from {API_URL}...")
     
-    # Simulate user browsing behavior
-    sleep_time = random.uniform(2, 5)
-    print(f"Sleeping for {sleep_time:.2f} seconds...")
-    time.sleep(sleep_time)
-    
     try:
         # Add timestamp to params to prevent caching
         params = {
@@ -32,7 +25,7 @@ def fetch_a_share_arbitrage():
             'page': 1
         }
         
-        response = requests.post(API_URL, headers=HEADERS, params=params, data=data)
+        response = jsl_request('POST', API_URL, headers=HEADERS, params=params, data=data)
         
         if response.status_code != 200:
             print(f"Failed to fetch data. Status code: {response.status_code}")
@@ -1,10 +1,8 @@
 
-import requests
 import json
 from datetime import datetime, timedelta
 from app.core.db import save_data
-import time
-import random
+from app.core import http_client
 
 # API for New Convertible Bonds (Issuance/Listing)
 # Returns list with PUBLIC_START_DATE (Subscription) and LISTING_DATE
@@ -17,9 +15,6 @@ HEADERS = {
 def fetch_issuance_data():
     print("Fetching Bond Issuance Data...")
     
-    # Simulate user behavior
-    time.sleep(random.uniform(2, 5))
-    
     params = {
         'reportName': 'RPT_BOND_CB_LIST',
         'columns': 'ALL',
@@ -32,7 +27,7 @@ def fetch_issuance_data():
     }
     
     try:
-        response = requests.get(API_URL, headers=HEADERS, params=params)
+        response = http_client.get(API_URL, headers=HEADERS, params=params)
         
         if response.status_code != 200:
             print(f"Failed to fetch data. Status: {response.status_code}")
@@ -1,8 +1,6 @@
-import requests
-import time
-import random
 from datetime import datetime
 from app.core.db import save_data
+from app.core import http_client
 from config.settings import STRATEGY_CONFIG
 
 # Configuration
@@ -23,9 +21,6 @@ def fetch_cbond_data():
     """Fetch all convertible bond data from Eastmoney (Real-time Market)."""
     print(f"Fetching Convertible Bond Market Data from Eastmoney...")
     
-    # Simulate user behavior
-    time.sleep(random.uniform(2, 4))
-    
     params = {
         'reportName': 'RPT_VALUE_ANALYSIS_CB', # Comprehensive analysis report
         'columns': 'ALL',
@@ -38,7 +33,7 @@ def fetch_cbond_data():
     }
     
     try:
-        response = requests.get(URL, headers=HEADERS, params=params)
+        response = http_client.get(URL, headers=HEADERS, params=params)
         
         if response.status_code != 200:
             print(f"Failed to fetch data. Status: {response.status_code}")
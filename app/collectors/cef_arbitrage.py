@@ -1,12 +1,10 @@
-from curl_cffi import requests
 import os
 import sys
-import time
-import random
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from app.core.db import save_data
+from app.core import http_client
 from config.settings import STRATEGY_CONFIG
 
 config = STRATEGY_CONFIG['cef']
@@ -16,60 +14,75 @@ load_dotenv()
 EMAIL = os.getenv("CEF_EMAIL")
 PASSWORD = os.getenv("CEF_PASSWORD")
 
+HOME_URL = "https://www.cefconnect.com/"
 LOGIN_URL = "https://www.cefconnect.com/User/Login.aspx"
 # We'll fetch all fields to avoid missing calculated fields like AvgDailyVolume
 DATA_URL = "https://www.cefconnect.com/api/v3/DailyPricing"
 
-def login_and_fetch_cef_data():
-    """Login to CEFConnect and fetch fund data via API with advanced filtering."""
-    session = requests.Session(impersonate="chrome120")
+# Logged-in session, created on the first request that misses the HTTP cache
+_session = None
+_login_error = None
+
+def login_cef_session():
+    """Logs in to CEFConnect once per process and returns the session (raises on failure)."""
+    global _session, _login_error
+    if _session is not None:
+        return _session
+    if _login_error:
+        raise RuntimeError(_login_error)
+
+    # Cached curl_cffi session (browser TLS fingerprint) reused for every call
+    session = http_client.get_session(HOME_URL, impersonate="chrome120")
     
     print(f"Opening home page to establish session...", flush=True)
+    # Initial visit
+    http_client.get(HOME_URL, session=session, timeout=30)
+    
+    print(f"Fetching login page for fields...", flush=True)
+    response = http_client.get(LOGIN_URL, session=session, timeout=30)
+    if response.status_code != 200:
+        _login_error = f"Failed to load login page. Status: {response.status_code}"
+        raise RuntimeError(_login_error)
+         
+    soup = BeautifulSoup(response.text, 'html.parser')
+    
     try:
-        # Initial visit
-        session.get("https://www.cefconnect.com/", timeout=30)
-        time.sleep(random.uniform(1, 2))
-        
-        print(f"Fetching login page for fields...", flush=True)
-        response = session.get(LOGIN_URL, timeout=30)
-        if response.status_code != 200:
-             print(f"Failed to load login page. Status: {response.status_code}", flush=True)
-             return []
-             
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        try:
-            viewstate = soup.find('input', {'name': '__VIEWSTATE'})['value']
-            viewstate_gen = soup.find('input', {'name': '__VIEWSTATEGENERATOR'})['value']
-            event_validation = soup.find('input', {'name': '__EVENTVALIDATION'})['value']
-        except Exception as e:
-            print(f"Could not find ASP.NET fields: {e}", flush=True)
-            return []
-            
-        print(f"Logging in to CEFConnect as {EMAIL}...", flush=True)
-        login_data = {
-            '__EVENTTARGET': '',
-            '__EVENTARGUMENT': '',
-            '__VIEWSTATE': viewstate,
-            '__VIEWSTATEGENERATOR': viewstate_gen,
-            '__EVENTVALIDATION': event_validation,
-            'email': EMAIL,
-            'password': PASSWORD,
-            'rememberMe': 'on',
-            'loginSubmit': '' 
-        }
-        
-        response = session.post(LOGIN_URL, data=login_data, timeout=30)
+        viewstate = soup.find('input', {'name': '__VIEWSTATE'})['value']
+        viewstate_gen = soup.find('input', {'name': '__VIEWSTATEGENERATOR'})['value']
+        event_validation = soup.find('input', {'name': '__EVENTVALIDATION'})['value']
+    except Exception as e:
+        _login_error = f"Could not find ASP.NET fields: {e}"
+        raise RuntimeError(_login_error)
         
-        if "Login.aspx" in response.url and "Invalid" in response.text:
-            print("Login failed. Check credentials.", flush=True)
-            return []
-            
-        print("Login successful. Fetching data from API...", flush=True)
-        time.sleep(random.uniform(1, 2))
+    print(f"Logging in to CEFConnect as {EMAIL}...", flush=True)
+    login_data = {
+        '__EVENTTARGET': '',
+        '__EVENTARGUMENT': '',
+        '__VIEWSTATE': viewstate,
+        '__VIEWSTATEGENERATOR': viewstate_gen,
+        '__EVENTVALIDATION': event_validation,
+        'email': EMAIL,
+        'password': PASSWORD,
+        'rememberMe': 'on',
+        'loginSubmit': '' 
+    }
+    
+    response = http_client.post(LOGIN_URL, session=session, data=login_data, timeout=30)
+    
+    if "Login.aspx" in response.url and "Invalid" in response.text:
+        _login_error = "Login failed. Check credentials."
+        raise RuntimeError(_login_error)
         
-        # Use a real browser-like header for the API call
-        response = session.get(DATA_URL, timeout=60)
+    print("Login successful.", flush=True)
+    _session = session
+    return session
+
+def login_and_fetch_cef_data():
+    """Login to CEFConnect and fetch fund data via API with advanced filtering."""
+    try:
+        # Served from the HTTP cache when fresh; the login only runs on a miss
+        print("Fetching data from API...", flush=True)
+        response = http_client.get(DATA_URL, session=login_cef_session, timeout=60)
         if response.status_code != 200:
             print(f"Failed to fetch data from API. Status: {response.status_code}", flush=True)
             return []
@@ -120,10 +133,8 @@ def login_and_fetch_cef_data():
                 
                 hist_url = f"https://www.cefconnect.com/api/v3/distributionhistory/fund/{ticker}/{start_date.strftime(date_fmt)}/{end_date.strftime(date_fmt)}"
                 
-                # Random short sleep to avoid rate limiting
-                time.sleep(random.uniform(0.5, 1.5)) 
-                
-                h_resp = session.get(hist_url, timeout=10)
+                # Paced by the cefconnect host budget (HOST_RATE_LIMITS)
+                h_resp = http_client.get(hist_url, session=login_cef_session, timeout=10)
                 if h_resp.status_code == 200:
                     h_data = h_resp.json()
                     dist_list = h_data.get('Data', [])
@@ -1,10 +1,10 @@
 
-import requests
 from bs4 import BeautifulSoup
 import time
 import random
 import re
 from app.core.db import save_data
+from app.core import http_client
 
 # Configurations
 CURRENCY_MAP = {
@@ -23,7 +23,7 @@ def fetch_boc_rates():
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        resp = requests.get(url, headers=headers)
+        resp = http_client.get(url, headers=headers)
         resp.encoding = 'utf-8'
         
         soup = BeautifulSoup(resp.text, 'html.parser')
@@ -3,7 +3,7 @@ import random
 import os
 from dotenv import load_dotenv
 from app.core.db import save_data
-from app.core.jsl_session import get_jsl_session
+from app.core.jsl_session import jsl_request
 from config.settings import STRATEGY_CONFIG
 
 load_dotenv()
@@ -23,8 +23,6 @@ ONLY_OPEN = config.get('only_open_apply', True)
 
 def fetch_data(url, fund_type):
     print(f"\n[+] 正在抓取 {fund_type} (URL: {url})...")
-    session = get_jsl_session()
-    
     try:
         params = {
             'rp': 500,  # 登录状态下 rp=500 是有效的，可一次拿全量
@@ -32,7 +30,7 @@ def fetch_data(url, fund_type):
             '___jsl': f'LST___t={int(time.time() * 1000)}'
         }
         
-        response = session.post(url, data=params)
+        response = jsl_request('POST', url, data=params)
         if response.status_code != 200:
             print(f"[!] 请求失败: {response.status_code}")
             return []
@@ -1,3 +1,5 @@
+# yfinance manages its own (curl_cffi) session and request pacing, so it is
+# not routed through app.core.http_client
 import yfinance as yf
 from app.core.db import save_data
 
@@ -1,9 +1,8 @@
 import time
-import random
 import os
 from dotenv import load_dotenv
 from app.core.db import save_data
-from app.core.jsl_session import get_jsl_session
+from app.core.jsl_session import jsl_request
 from config.settings import STRATEGY_CONFIG
 
 # Load environment variables
@@ -32,13 +31,6 @@ def fetch_qdii_data(market_name, url):
     """Fetch QDII data from the given URL and return filtered list."""
     print(f"Fetching {market_name} QDII data from {url}...")
     
-    # Simulate user browsing behavior
-    sleep_time = random.uniform(2, 5)
-    print(f"Sleeping for {sleep_time:.2f} seconds...")
-    time.sleep(sleep_time)
-    
-    session = get_jsl_session()
-    
     try:
         params = {
             'rp': 500,
@@ -47,7 +39,7 @@ def fetch_qdii_data(market_name, url):
             '___jsl': f'LST___t={int(time.time() * 1000)}'
         }
         
-        response = session.get(url, params=params)
+        response = jsl_request('GET', url, params=params)
         
         if response.status_code != 200:
             print(f"Failed to fetch data. Status code: {response.status_code}")
@@ -1,9 +1,7 @@
-import requests
-import time
-import random
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from app.core.db import save_data
+from app.core import http_client
 from config.settings import STRATEGY_CONFIG
 
 config = STRATEGY_CONFIG['spac']
@@ -18,12 +16,8 @@ def fetch_spac_arbitrage():
     """Fetch SPAC stocks from stockanalysis.com and calculate arbitrage yield."""
     print(f"Fetching SPAC stocks data from {URL}...")
     
-    # Simulate user browsing behavior
-    sleep_time = random.uniform(1, 3)
-    time.sleep(sleep_time)
-    
     try:
-        response = requests.get(URL, headers=HEADERS, timeout=15)
+        response = http_client.get(URL, headers=HEADERS, timeout=15)
         if response.status_code != 200:
             print(f"Failed to fetch data. Status code: {response.status_code}")
             return []
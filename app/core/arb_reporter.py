@@ -2,7 +2,8 @@
 import sqlite3
 import os
 from datetime import datetime
-from app.core.db import get_db_connection, OUTPUT_DIR
+import json
+from app.core.db import get_db_connection, init_db, load_snapshot_state, OUTPUT_DIR
 from config.settings import STRATEGY_CONFIG
 
 def fetch_daily_data(table_name, date_str, columns="*"):
@@ -20,6 +21,71 @@ def fetch_daily_data(table_name, date_str, columns="*"):
     finally:
         conn.close()
 
+# Columns returned by fetch_history per table: a label column, then the series
+HISTORY_COLUMNS = {
+    'lof_funds': ['fund_name', 'price', 'nav', 'premium_rate'],
+    'qdii_arbitrage': ['fund_name', 'price', 'premium_rate', 'realtime_premium_rate'],
+    'stock_arbitrage': ['stock_name', 'price', 'choose_price'],
+    'cbond_double_low': ['bond_name', 'price', 'premium_rate', 'dblow'],
+    'cbond_putback': ['bond_name', 'price', 'premium_rate', 'put_dt'],
+    'cef_arbitrage': ['name', 'price', 'nav', 'discount', 'z_score'],
+    'spac_arbitrage': ['name', 'price', 'nav', 'yield'],
+    'market_indices': ['name', 'price', 'change_pct'],
+    'commodities': ['name', 'price', 'change_pct'],
+    'forex_rates': ['bank', 'spot_buy', 'spot_sell'],
+}
+
+def fetch_history(instrument_id, since=None, until=None, tables=None):
+    """
+    Daily time series for one fund / bond / ticker across the arb tables, using
+    the (instrument, date) indexes and any archived months. Returns
+    [(table_name, columns, rows)] for the tables that hold the instrument;
+    columns are ['date'] + HISTORY_COLUMNS[table].
+    """
+    # pyarrow is only loaded when history is actually requested
+    from app.core.archive import read_rows
+    init_db()
+    conn = get_db_connection()
+    results = []
+    try:
+        for table_name in tables or HISTORY_COLUMNS:
+            columns = ['date'] + HISTORY_COLUMNS[table_name]
+            rows = read_rows(table_name, columns, instrument_id=instrument_id, since=since, until=until, conn=conn)
+            if rows:
+                results.append((table_name, columns, rows))
+    except sqlite3.Error as e:
+        print(f"Error reading history for {instrument_id}: {e}")
+    finally:
+        conn.close()
+    return results
+
+def fetch_snapshot_as_of(table_name, as_of=None):
+    """
+    Rebuilds a table's rows as they stood at `as_of` (datetime or ISO string,
+    default now) from the intraday snapshots. Returns (records, taken_at of the
+    snapshot used), or ([], None) when no snapshot precedes `as_of`.
+    """
+    if as_of is None:
+        as_of = datetime.now()
+    as_of = as_of.isoformat() if isinstance(as_of, datetime) else str(as_of).replace(' ', 'T')
+    init_db()
+    conn = get_db_connection()
+    try:
+        snapshot = conn.execute(
+            "SELECT id, taken_at FROM snapshots WHERE table_name = ? AND taken_at <= ? ORDER BY taken_at DESC, id DESC LIMIT 1",
+            (table_name, as_of)
+        ).fetchone()
+        if not snapshot:
+            return [], None
+        state = load_snapshot_state(conn, table_name, snapshot[0])
+        records = [json.loads(payload) for _, payload in sorted(state.items())]
+        return records, snapshot[1]
+    except sqlite3.Error as e:
+        print(f"Error reading snapshots of {table_name}: {e}")
+        return [], None
+    finally:
+        conn.close()
+
 def fetch_latest_data(table_name, columns="*", limit=50):
     """Fetches the latest available records from a table regardless of date."""
     conn = get_db_connection()
@@ -30,7 +96,7 @@ def fetch_latest_data(table_name, columns="*", limit=50):
         latest_date = cursor.fetchone()[0]
         
         if not latest_date:
-            return [], []
+            return [], [], None
             
         cursor.execute(f"SELECT {columns} FROM {table_name} WHERE date = ? LIMIT ?", (latest_date, limit))
         rows = cursor.fetchall()
@@ -60,9 +126,9 @@ def format_table(rows, headers, alignments=None):
     
     separator_line = "| " + " | ".join([align_map.get(a, ':---') for a in alignments]) + " |"
     
-    body = ""
-    for row in rows:
-        row_str = [str(x).replace('|', '\\|') for x in row]
-        body += "| " + " | ".join(row_str) + " |\n"
+    body = "".join(
+        "| " + " | ".join(str(x).replace('|', '\\|') for x in row) + " |\n"
+        for row in rows
+    )
         
     return f"{header_line}\n{separator_line}\n{body}"
@@ -0,0 +1,219 @@
+import importlib.util
+import os
+import sqlite3
+from datetime import date
+import config.settings as settings
+from app.core import db
+from app.core.db import get_db_connection, init_db, INSTRUMENT_COLUMNS
+
+# pyarrow is optional: without it nothing is archived and reads only see the hot DB.
+# It takes ~150 ms to import, so it is only loaded once Parquet is actually touched.
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+ARCHIVE_DIR = os.path.join(db.DATA_DIR, 'archive')
+# Months kept in finance_data.db, counting the current one (older, closed months are archived)
+ARCHIVE_KEEP_MONTHS = getattr(settings, 'ARCHIVE_KEEP_MONTHS', 1)
+ARCHIVE_COMPRESSION = getattr(settings, 'ARCHIVE_COMPRESSION', 'zstd')
+ARCHIVE_VACUUM = getattr(settings, 'ARCHIVE_VACUUM', True)
+
+# Declared SQLite column type -> Arrow type (anything else is stored as text)
+_ARROW_TYPES = {
+    'INTEGER': 'int64',
+    'REAL': 'float64',
+}
+
+def _arrow():
+    """(pyarrow, pyarrow.parquet), imported on first use."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    return pa, pq
+
+def month_path(table_name, month):
+    """data/archive/<table>/<YYYY-MM>.parquet"""
+    return os.path.join(ARCHIVE_DIR, table_name, f"{month}.parquet")
+
+def archived_months(table_name):
+    """Sorted 'YYYY-MM' partitions on disk for the table."""
+    folder = os.path.join(ARCHIVE_DIR, table_name)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name[:-len('.parquet')] for name in os.listdir(folder) if name.endswith('.parquet'))
+
+def _next_month(month):
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+def _cutoff_month(keep_months):
+    """First month that stays hot: the current month minus (keep_months - 1)."""
+    today = date.today()
+    index = today.year * 12 + today.month - 1 - max(keep_months - 1, 0)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def _table_schema(conn, table_name):
+    """[(column, declared type)] in table order."""
+    return [(row[1], (row[2] or '').upper()) for row in conn.execute(f"PRAGMA table_info({table_name})")]
+
+def _to_arrow(schema, rows):
+    """Columnar Arrow table typed from the SQLite declarations; a column holding stray values becomes text."""
+    pa, _ = _arrow()
+    arrays = []
+    for i, (column, declared) in enumerate(schema):
+        values = [row[i] for row in rows]
+        arrow_type = getattr(pa, _ARROW_TYPES.get(declared, 'string'))()
+        try:
+            arrays.append(pa.array(values, type=arrow_type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+            arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+    return pa.Table.from_arrays(arrays, names=[column for column, _ in schema])
+
+def _read_existing(path, schema):
+    """Rows of an existing month file in the current column order (columns added later read as None)."""
+    _, pq = _arrow()
+    table = pq.read_table(path)
+    columns = {name: table.column(name).to_pylist() for name in table.column_names}
+    missing = [None] * table.num_rows
+    return list(zip(*[columns.get(column, missing) for column, _ in schema]))
+
+def _write_month(table_name, month, schema, rows):
+    """
+    Writes (or extends) the month's Parquet file atomically and returns its
+    row count. Rows already in the file with the same id are replaced, so
+    re-running after an interrupted prune does not duplicate them.
+    """
+    _, pq = _arrow()
+    path = month_path(table_name, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        new_ids = {row[0] for row in rows}
+        rows = [row for row in _read_existing(path, schema) if row[0] not in new_ids] + rows
+        rows.sort(key=lambda row: (row[0] is None, row[0]))
+    tmp_path = path + '.tmp'
+    pq.write_table(_to_arrow(schema, rows), tmp_path, compression=ARCHIVE_COMPRESSION)
+    written = pq.read_metadata(tmp_path).num_rows
+    if written != len(rows):
+        os.remove(tmp_path)
+        raise IOError(f"{tmp_path}: wrote {written} rows, expected {len(rows)}")
+    os.replace(tmp_path, path)
+    return written
+
+def compact_table(conn, table_name, cutoff):
+    """Archives and prunes every month of `table_name` before `cutoff`; returns (months, rows moved)."""
+    # The month of the latest date always stays hot so the daily report keeps working
+    latest = conn.execute(f"SELECT MAX(date) FROM {table_name}").fetchone()[0]
+    if not latest:
+        return 0, 0
+    cutoff = min(cutoff, latest[:7])
+    months = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT substr(date, 1, 7) FROM {table_name} WHERE date < ? ORDER BY 1", (f"{cutoff}-01",)
+    )]
+    schema = _table_schema(conn, table_name)
+    moved = 0
+    for month in months:
+        bounds = (f"{month}-01", f"{_next_month(month)}-01")
+        rows = conn.execute(
+            f"SELECT * FROM {table_name} WHERE date >= ? AND date < ? ORDER BY id", bounds
+        ).fetchall()
+        total = _write_month(table_name, month, schema, rows)
+        # Only prune once the file is safely in place
+        with conn:
+            conn.execute(f"DELETE FROM {table_name} WHERE date >= ? AND date < ?", bounds)
+        moved += len(rows)
+        size_kb = os.path.getsize(month_path(table_name, month)) / 1024
+        print(f"[ARCHIVE] {table_name} {month}: {len(rows)} rows archived ({total} in file, {size_kb:.1f} KB)")
+    return len(months), moved
+
+def compact_closed_months(tables=None, keep_months=None):
+    """
+    Moves closed months of the arb tables from finance_data.db into
+    data/archive/<table>/<YYYY-MM>.parquet (one compressed columnar file per
+    table and month), then deletes them from the DB. Returns rows moved.
+    """
+    if not HAS_PYARROW:
+        print("[WARN] pyarrow is not installed; skipping archive compaction.")
+        return 0
+    pa, _ = _arrow()
+    init_db()
+    cutoff = _cutoff_month(ARCHIVE_KEEP_MONTHS if keep_months is None else keep_months)
+    size_before = os.path.getsize(db.DB_PATH)
+    conn = get_db_connection()
+    total_months = total_rows = 0
+    try:
+        for table_name in tables or INSTRUMENT_COLUMNS:
+            months, rows = compact_table(conn, table_name, cutoff)
+            total_months += months
+            total_rows += rows
+        if total_rows and ARCHIVE_VACUUM:
+            conn.execute("VACUUM")
+    except (sqlite3.Error, OSError, pa.ArrowException) as e:
+        print(f"[ERR] Archive compaction stopped: {e}")
+    finally:
+        conn.close()
+    size_after = os.path.getsize(db.DB_PATH)
+    print(f"[STATS] Archived {total_rows} rows in {total_months} table-months before {cutoff}; "
+          f"finance_data.db {size_before / 1048576:.1f} MB -> {size_after / 1048576:.1f} MB")
+    return total_rows
+
+def _read_archived(table_name, columns, instrument_id, since, until):
+    """(id, *columns) rows from the month files overlapping [since, until]."""
+    # Partition pruning by file name before anything is opened (or pyarrow imported)
+    months = [month for month in archived_months(table_name)
+              if not ((since and month < since[:7]) or (until and month > until[:7]))]
+    if not months:
+        return []
+    if not HAS_PYARROW:
+        print(f"[WARN] pyarrow is not installed; archived months of {table_name} are not included.")
+        return []
+    _, pq = _arrow()
+    filters = []
+    if instrument_id is not None:
+        filters.append((INSTRUMENT_COLUMNS[table_name], '==', str(instrument_id)))
+    if since:
+        filters.append(('date', '>=', since))
+    if until:
+        filters.append(('date', '<=', until))
+    rows = []
+    for month in months:
+        path = month_path(table_name, month)
+        present = set(pq.read_schema(path).names)
+        wanted = ['id'] + [c for c in columns if c in present]
+        table = pq.read_table(path, columns=wanted, filters=filters or None)
+        data = {name: table.column(name).to_pylist() for name in wanted}
+        missing = [None] * table.num_rows
+        rows.extend(zip(*[data['id']] + [data.get(c, missing) for c in columns]))
+    return rows
+
+def read_rows(table_name, columns, instrument_id=None, since=None, until=None, conn=None):
+    """
+    Rows (tuples of `columns`) of an arb table from both the archive and the
+    hot DB, optionally for one instrument and a date range, ordered by date
+    ('date' must be among the columns). Callers do not need to know which
+    months have been compacted.
+    """
+    query = f"SELECT id, {', '.join(columns)} FROM {table_name} WHERE 1 = 1"
+    params = []
+    if instrument_id is not None:
+        query += f" AND {INSTRUMENT_COLUMNS[table_name]} = ?"
+        params.append(instrument_id)
+    if since:
+        query += " AND date >= ?"
+        params.append(since)
+    if until:
+        query += " AND date <= ?"
+        params.append(until)
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    try:
+        hot = conn.execute(query, params).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+    hot_ids = {row[0] for row in hot}
+    # A row can be in both only if a prune was interrupted; the DB copy wins
+    archived = [row for row in _read_archived(table_name, columns, instrument_id, since, until) if row[0] not in hot_ids]
+    date_index = columns.index('date')
+    rows = [row[1:] for row in archived + hot]
+    rows.sort(key=lambda row: row[date_index] or '')
+    return rows
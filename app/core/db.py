@@ -1,7 +1,10 @@
 
+import json
 import sqlite3
 import os
+import threading
 from datetime import datetime
+import config.settings as settings
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,17 +14,19 @@ DB_DIR = DATA_DIR  # Move DB to data directory
 DB_NAME = 'finance_data.db'
 DB_PATH = os.path.join(DB_DIR, DB_NAME)
 
+# Intraday snapshot mode (delta-encoded saves), enabled with --snapshot
+SNAPSHOT_MODE = getattr(settings, 'ARB_SNAPSHOT_MODE', False)
+
 def get_db_connection():
     if not os.path.exists(DB_DIR):
         os.makedirs(DB_DIR)
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
-    return sqlite3.connect(DB_PATH)
+    # Collectors save from several threads (see scheduler); wait for the write lock
+    return sqlite3.connect(DB_PATH, timeout=30)
 
-def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def _create_base_tables(cursor):
+    """Migration 1: the original arb tables (CREATE IF NOT EXISTS, so safe on existing DBs)."""
     # LOF Table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS lof_funds (
@@ -41,19 +46,6 @@ def init_db():
         )
     ''')
     
-    # Simple migration for existing lof_funds table missing 'nav' column
-    try:
-        cursor.execute("SELECT nav FROM lof_funds LIMIT 1")
-    except sqlite3.OperationalError:
-        print("[DB] Adding 'nav' column to lof_funds table...")
-        cursor.execute("ALTER TABLE lof_funds ADD COLUMN nav REAL")
-        
-    try:
-        cursor.execute("SELECT is_estimated_nav FROM lof_funds LIMIT 1")
-    except sqlite3.OperationalError:
-        print("[DB] Adding 'is_estimated_nav' column to lof_funds table...")
-        cursor.execute("ALTER TABLE lof_funds ADD COLUMN is_estimated_nav INTEGER DEFAULT 0")
-    
     # Bond Issuance Table (New Bonds)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS bond_issuance (
@@ -217,61 +209,277 @@ def init_db():
         )
     ''')
 
-    
-    conn.commit()
-    conn.close()
 
-def clear_todays_data(table_name):
+def add_column_if_missing(cursor, table_name, column, column_type):
+    """ALTER TABLE ... ADD COLUMN that tolerates columns added by older versions."""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")}
+    if column not in existing:
+        print(f"[DB] Adding '{column}' column to {table_name} table...")
+        cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} {column_type}")
+
+# Instrument identifier column of each arb table (used for the history indexes / API)
+INSTRUMENT_COLUMNS = {
+    'lof_funds': 'fund_id',
+    'qdii_arbitrage': 'fund_id',
+    'stock_arbitrage': 'stock_id',
+    'bond_issuance': 'bond_code',
+    'cbond_double_low': 'bond_id',
+    'cbond_putback': 'bond_id',
+    'cef_arbitrage': 'ticker',
+    'spac_arbitrage': 'symbol',
+    'market_indices': 'symbol',
+    'commodities': 'symbol',
+    'forex_rates': 'currency',
+}
+
+# Columns identifying one row of a snapshot (snapshot_rows.instrument_id holds
+# their values joined by '|'). The same fund is listed in several QDII / LOF
+# market lists and the same stock under several arbitrage types, so there the
+# instrument id alone is not unique; other tables use INSTRUMENT_COLUMNS.
+SNAPSHOT_KEYS = {
+    'qdii_arbitrage': ('fund_id', 'market_type'),
+    'lof_funds': ('fund_id', 'fund_type'),
+    'stock_arbitrage': ('stock_id', 'type_cd'),
+}
+
+def _create_history_indexes(cursor):
+    """(date) for the daily/latest report queries, (instrument, date) for history lookups."""
+    for table_name, column in INSTRUMENT_COLUMNS.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_date ON {table_name} (date)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_instrument_date ON {table_name} ({column}, date)")
+
+def _create_snapshot_tables(cursor):
+    """Intraday snapshots: one row per save, plus only the rows that changed since the previous one."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT,
+            date TEXT,
+            taken_at TEXT,
+            changed INTEGER,
+            removed INTEGER
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_table_time ON snapshots (table_name, taken_at)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS snapshot_rows (
+            table_name TEXT,
+            instrument_id TEXT,
+            snapshot_id INTEGER,
+            payload TEXT,           -- JSON row; NULL = instrument dropped out (tombstone)
+            PRIMARY KEY (table_name, instrument_id, snapshot_id)
+        ) WITHOUT ROWID
+    ''')
+    # Current state per instrument (latest non-tombstone row)
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS snapshot_latest AS
+        SELECT r.table_name, r.instrument_id, r.snapshot_id, s.taken_at, r.payload
+        FROM snapshot_rows r
+        JOIN snapshots s ON s.id = r.snapshot_id
+        WHERE r.snapshot_id = (
+            SELECT MAX(r2.snapshot_id) FROM snapshot_rows r2
+            WHERE r2.table_name = r.table_name AND r2.instrument_id = r.instrument_id
+        )
+        AND r.payload IS NOT NULL
+    ''')
+
+# Ordered schema migrations: (version, description, function(cursor)).
+# Append new entries; never edit or reorder applied ones.
+MIGRATIONS = [
+    (1, "base arb tables", _create_base_tables),
+    (2, "lof_funds.nav", lambda cursor: add_column_if_missing(cursor, 'lof_funds', 'nav', 'REAL')),
+    (3, "lof_funds.is_estimated_nav", lambda cursor: add_column_if_missing(cursor, 'lof_funds', 'is_estimated_nav', 'INTEGER DEFAULT 0')),
+    (4, "date / instrument indexes", _create_history_indexes),
+    (5, "intraday snapshots", _create_snapshot_tables),
+]
+
+# Schema is checked once per process (see init_db)
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def get_schema_version(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at DATETIME
+        )
+    ''')
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    return cursor.fetchone()[0] or 0
+
+def init_db():
+    """
+    Brings finance_data.db up to the latest schema version. Pending migrations
+    run in order, each in its own transaction; after the first successful call
+    in a process this is a no-op.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = get_db_connection()
+        conn.isolation_level = None  # explicit transactions (DDL included)
+        cursor = conn.cursor()
+        try:
+            if get_schema_version(cursor) < MIGRATIONS[-1][0]:
+                for version, description, migrate in MIGRATIONS:
+                    # IMMEDIATE takes the write lock, so a concurrent process waits and then skips
+                    cursor.execute("BEGIN IMMEDIATE")
+                    try:
+                        if get_schema_version(cursor) < version:
+                            migrate(cursor)
+                            cursor.execute(
+                                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                                (version, description, datetime.now().isoformat())
+                            )
+                            print(f"[DB] Applied migration {version}: {description}")
+                        cursor.execute("COMMIT")
+                    except Exception:
+                        cursor.execute("ROLLBACK")
+                        raise
+            _schema_ready = True
+        finally:
+            conn.close()
+
+def clear_todays_data(table_name, conn):
     """
     Removes data for the current date to ensure idempotency (latest data only).
+    Runs on the caller's connection / transaction.
     """
     today = datetime.now().strftime('%Y-%m-%d')
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"DELETE FROM {table_name} WHERE date = ?", (today,))
-    conn.commit()
+    cursor = conn.execute(f"DELETE FROM {table_name} WHERE date = ?", (today,))
     deleted_count = cursor.rowcount
-    conn.close()
     if deleted_count > 0:
         print(f"Cleared {deleted_count} old records from {table_name} for today ({today}).")
     return today
 
+def set_snapshot_mode(enabled):
+    """--snapshot: save_data records intraday snapshots instead of replacing today's rows."""
+    global SNAPSHOT_MODE
+    SNAPSHOT_MODE = enabled
+
+def load_snapshot_state(conn, table_name, snapshot_id=None):
+    """{instrument_id: payload JSON} as of `snapshot_id` (default: latest), tombstones excluded."""
+    query = '''
+        SELECT r.instrument_id, r.payload FROM snapshot_rows r
+        WHERE r.table_name = ? AND r.snapshot_id = (
+            SELECT MAX(r2.snapshot_id) FROM snapshot_rows r2
+            WHERE r2.table_name = r.table_name AND r2.instrument_id = r.instrument_id
+            AND r2.snapshot_id <= ?
+        )
+        AND r.payload IS NOT NULL
+    '''
+    bound = snapshot_id if snapshot_id is not None else 2 ** 62
+    return dict(conn.execute(query, (table_name, bound)).fetchall())
+
+def snapshot_key_columns(table_name):
+    return SNAPSHOT_KEYS.get(table_name, (INSTRUMENT_COLUMNS[table_name],))
+
+def snapshot_key(key_columns, record):
+    """snapshot_rows.instrument_id of a record, e.g. '513100|nasdaq' or '600036'."""
+    return '|'.join(str(record[c]) for c in key_columns)
+
+def save_snapshot(table_name, records):
+    """
+    Records one intraday snapshot of `records`: only instruments whose values
+    changed since the previous snapshot (or that disappeared) are stored, keyed
+    by the table's snapshot key (see SNAPSHOT_KEYS).
+    The daily table gets today's full set on the first snapshot of the day;
+    later snapshots only rewrite the changed instruments' rows.
+    """
+    key_columns = snapshot_key_columns(table_name)
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
+    timestamp = now.isoformat()
+
+    current = {}
+    for r in records:
+        current[snapshot_key(key_columns, r)] = (r, json.dumps(r, sort_keys=True, ensure_ascii=False, default=str))
+    if len(current) < len(records):
+        print(f"[WARN] {table_name}: {len(records) - len(current)} rows repeat a ({', '.join(key_columns)}) "
+              f"key; only the last of each is kept.")
+
+    columns = list(records[0].keys()) + ['date', 'timestamp']
+    insert_query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?' for _ in columns])})"
+
+    conn = get_db_connection()
+    try:
+        with conn:
+            previous = load_snapshot_state(conn, table_name)
+            changed = [key for key, (_, payload) in current.items() if previous.get(key) != payload]
+            removed = [key for key in previous if key not in current]
+            first_today = conn.execute(
+                "SELECT 1 FROM snapshots WHERE table_name = ? AND date = ? LIMIT 1", (table_name, today)
+            ).fetchone() is None
+
+            cursor = conn.execute(
+                "INSERT INTO snapshots (table_name, date, taken_at, changed, removed) VALUES (?, ?, ?, ?, ?)",
+                (table_name, today, timestamp, len(changed), len(removed))
+            )
+            snapshot_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO snapshot_rows (table_name, instrument_id, snapshot_id, payload) VALUES (?, ?, ?, ?)",
+                [(table_name, key, snapshot_id, current[key][1]) for key in changed] +
+                [(table_name, key, snapshot_id, None) for key in removed]
+            )
+
+            # Daily table: full set once a day, afterwards only what changed
+            if first_today:
+                clear_todays_data(table_name, conn)
+                touched = list(current)
+            else:
+                touched = changed
+                # Removed rows are only known from their last payload
+                old_rows = [current[key][0] for key in changed] + [json.loads(previous[key]) for key in removed]
+                conn.executemany(
+                    f"DELETE FROM {table_name} WHERE "
+                    f"{' AND '.join(f'{c} IS ?' for c in key_columns)} AND date = ?",
+                    [tuple(r.get(c) for c in key_columns) + (today,) for r in old_rows]
+                )
+            conn.executemany(insert_query, [
+                tuple(current[key][0][c] for c in columns[:-2]) + (today, timestamp) for key in touched
+            ])
+        print(f"[SNAPSHOT] {table_name} #{snapshot_id}: {len(changed)} changed, {len(removed)} removed, "
+              f"{len(current) - len(changed)} unchanged")
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+    finally:
+        conn.close()
+
 def save_data(table_name, records):
     """
     Saves a list of dictionaries to the specified table.
     Assumes records have keys matching column names (except id, date, timestamp).
+    In snapshot mode the save is delta-encoded (see save_snapshot).
     """
     if not records:
         print(f"No records to save for {table_name}.")
         return
 
     init_db()
-    today = clear_todays_data(table_name)
+    if SNAPSHOT_MODE and table_name in INSTRUMENT_COLUMNS:
+        save_snapshot(table_name, records)
+        return
+
     timestamp = datetime.now().isoformat()
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    if not records: return
-    
-    processed_records = []
-    for r in records:
-        r_copy = r.copy()
-        r_copy['date'] = today
-        r_copy['timestamp'] = timestamp
-        processed_records.append(r_copy)
-    
-    columns = list(processed_records[0].keys())
+    columns = list(records[0].keys()) + ['date', 'timestamp']
     placeholders = ', '.join(['?' for _ in columns])
     col_names = ', '.join(columns)
     
-    values = [tuple(r[c] for c in columns) for r in processed_records]
-    
     query = f"INSERT INTO {table_name} ({col_names}) VALUES ({placeholders})"
     
+    # Delete + insert in one transaction on one connection: readers never see
+    # today's rows missing, and a failed insert keeps the previous data
+    conn = get_db_connection()
     try:
-        cursor.executemany(query, values)
-        conn.commit()
+        with conn:
+            today = clear_todays_data(table_name, conn)
+            values = [tuple(r[c] for c in columns[:-2]) + (today, timestamp) for r in records]
+            conn.executemany(query, values)
         print(f"Saved {len(records)} records to {table_name}.")
     except sqlite3.Error as e:
         print(f"Database error: {e}")
@@ -1,8 +1,27 @@
 # fetcher.py
+import gzip
+import threading
+import time
+import zlib
+import urllib.request
+import urllib.error
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import feedparser
 from urllib.parse import urlparse
 from datetime import datetime
 from time import mktime
+import config.settings as settings
+from app.core.news_db import load_feed_validators
+
+# Use a common browser User-Agent to avoid being blocked (403 Forbidden)
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Concurrency options (overridable in config/settings.py)
+FETCH_CONCURRENCY = getattr(settings, 'FETCH_CONCURRENCY', 8)
+FETCH_PER_HOST_LIMIT = getattr(settings, 'FETCH_PER_HOST_LIMIT', 2)
+FETCH_TIMEOUT = getattr(settings, 'FETCH_TIMEOUT', 20)
+FEED_CONDITIONAL_GET = getattr(settings, 'FEED_CONDITIONAL_GET', True)
 
 def get_source_name(feed_url):
     """Extracts a readable source name from the feed URL."""
@@ -13,24 +32,69 @@ def get_source_name(feed_url):
     except IndexError:
         return domain
 
-def fetch_feed(feed_url):
+def decode_body(body, encoding):
+    """Undoes a gzip / deflate Content-Encoding (deflate may be zlib-wrapped or raw)."""
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.decompress(body)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+def download_feed(feed_url, timeout=None, etag=None, modified=None):
+    """
+    Downloads the raw feed document (gzip / deflate compressed on the wire, like
+    feedparser's own fetcher), sending If-None-Match / If-Modified-Since when
+    validators from a previous run are given.
+    Returns (status, headers, body); body is None for 304 and HTTP errors.
+    """
+    headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate'}
+    if etag:
+        headers['If-None-Match'] = etag
+    if modified:
+        headers['If-Modified-Since'] = modified
+    request = urllib.request.Request(feed_url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            headers = {k.lower(): v for k, v in response.headers.items()}
+            headers.setdefault('content-location', response.geturl())
+            body = decode_body(response.read(), headers.pop('content-encoding', None))
+            return response.status, headers, body
+    except urllib.error.HTTPError as e:
+        return e.code, {k.lower(): v for k, v in (e.headers or {}).items()}, None
+
+def fetch_feed(feed_url, timeout=None, validators=None):
     """
     Fetches and parses a single RSS/Atom feed.
     Returns a list of article dictionaries.
+
+    `validators` is an optional {'etag', 'modified'} dict from the previous run.
+    It is sent as a conditional GET and updated in place with the new values.
     """
     print(f"  - Fetching: {feed_url}")
     try:
-        # Use a common browser User-Agent to avoid being blocked (403 Forbidden)
-        user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        
-        feed = feedparser.parse(feed_url, agent=user_agent)
-        
+        validators = validators if validators is not None else {}
+        status, headers, body = download_feed(
+            feed_url, timeout=timeout,
+            etag=validators.get('etag'), modified=validators.get('modified')
+        )
+
+        # Not modified since last run: nothing new to parse
+        if status == 304:
+            validators['not_modified'] = True
+            print("    => Not modified since last fetch (304).")
+            return []
+
         # Check for HTTP errors (like 403)
-        status = getattr(feed, 'status', None)
         if status and status >= 400:
             print(f"    [ERR] HTTP Error {status}: {feed_url}")
             return []
 
+        feed = feedparser.parse(body, response_headers=headers)
+
         if feed.bozo:
             # Bozo error can sometimes be ignored if entries are still present
             if not feed.entries:
@@ -38,6 +102,11 @@ def fetch_feed(feed_url):
             else:
                 pass # Many feeds have minor XML errors but work fine
 
+        # Only remember validators for documents we could actually read
+        if feed.entries:
+            validators['etag'] = headers.get('etag')
+            validators['modified'] = headers.get('last-modified')
+
         source_name = get_source_name(feed_url)
         articles = []
         
@@ -65,15 +134,100 @@ def fetch_feed(feed_url):
         print(f"    [ERR] Fetch failed: {feed_url}, Error: {e}")
         return []
 
-def fetch_all_feeds(feed_urls):
+class HostLimiter:
+    """Caps the number of in-flight requests per host."""
+
+    def __init__(self, per_host):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def get(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+def _timed_fetch(url, host_limiter, timeout, validators):
+    """Runs fetch_feed under the per-host cap. Returns (articles, elapsed seconds)."""
+    with host_limiter.get(url):
+        started = time.perf_counter()
+        articles = fetch_feed(url, timeout=timeout, validators=validators)
+        return articles, time.perf_counter() - started
+
+def iter_feed_articles(feed_urls, concurrency=None, per_host_limit=None, timeout=None, conditional=False,
+                       window_start=None, validators_out=None):
     """
-    Fetches all RSS feeds in the list and returns a consolidated article list.
+    Yields articles feed by feed as soon as each feed (and all feeds before it)
+    has arrived, so downstream stages can start before the slowest feed.
+    With concurrency > 1 feeds are fetched in a thread pool with a bounded
+    look-ahead window; the order matches the serial path (feed order, then entry order).
+    conditional=True sends the validators stored by earlier runs whose window
+    covers `window_start`; unchanged feeds (304) then contribute no entries, so
+    it is only for callers that refill them from news_data.db (the incremental
+    pipeline). The new validators are put into `validators_out` when given; the
+    caller stores them (save_feed_validators) once the articles are saved.
     """
-    all_articles = []
+    concurrency = FETCH_CONCURRENCY if concurrency is None else concurrency
+    per_host_limit = FETCH_PER_HOST_LIMIT if per_host_limit is None else per_host_limit
+    timeout = FETCH_TIMEOUT if timeout is None else timeout
+    conditional = conditional and FEED_CONDITIONAL_GET and window_start is not None
+
+    stored = load_feed_validators(window_start) if conditional else {}
+    validators = {url: dict(stored.get(url, {})) for url in feed_urls}
+
     print("\n[Stage 1/5] Starting RSS feed aggregation...")
-    for url in feed_urls:
-        articles_from_feed = fetch_feed(url)
-        if articles_from_feed:
-            all_articles.extend(articles_from_feed)
-    print(f"[Stage 1/5] Complete! Total articles aggregated: {len(all_articles)}")
-    return all_articles
+    wall_start = time.perf_counter()
+    feed_seconds = 0.0
+    total_articles = 0
+    host_limiter = HostLimiter(per_host_limit)
+
+    if concurrency <= 1 or len(feed_urls) <= 1:
+        for url in feed_urls:
+            articles_from_feed, elapsed = _timed_fetch(url, host_limiter, timeout, validators[url])
+            feed_seconds += elapsed
+            total_articles += len(articles_from_feed)
+            yield from articles_from_feed
+    else:
+        # Keep at most 2x concurrency feeds in flight or buffered
+        window = concurrency * 2
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(feed_urls))) as pool:
+            pending = deque()
+            urls = iter(feed_urls)
+            for url in urls:
+                pending.append(pool.submit(_timed_fetch, url, host_limiter, timeout, validators[url]))
+                if len(pending) >= window:
+                    break
+            # Collect in submission order so the article order matches the serial path
+            while pending:
+                articles_from_feed, elapsed = pending.popleft().result()
+                next_url = next(urls, None)
+                if next_url is not None:
+                    pending.append(pool.submit(_timed_fetch, next_url, host_limiter, timeout, validators[next_url]))
+                feed_seconds += elapsed
+                total_articles += len(articles_from_feed)
+                yield from articles_from_feed
+
+    if validators_out is not None:
+        validators_out.update(validators)
+    not_modified = sum(1 for v in validators.values() if v.get('not_modified'))
+
+    wall_seconds = time.perf_counter() - wall_start
+    print(f"[Stage 1/5] Complete! Total articles aggregated: {total_articles}")
+    if not_modified:
+        print(f"    [CACHE] {not_modified}/{len(feed_urls)} feeds unchanged since last fetch (304).")
+    print(f"    [STATS] {len(feed_urls)} feeds in {wall_seconds:.2f}s wall time "
+          f"(serial estimate {feed_seconds:.2f}s, saved {max(0.0, feed_seconds - wall_seconds):.2f}s)")
+
+def fetch_all_feeds(feed_urls, concurrency=None, per_host_limit=None, timeout=None, conditional=False,
+                    window_start=None, validators_out=None):
+    """
+    Fetches all RSS feeds in the list and returns a consolidated article list.
+    See iter_feed_articles for the concurrency and conditional GET options.
+    """
+    return list(iter_feed_articles(
+        feed_urls, concurrency=concurrency, per_host_limit=per_host_limit,
+        timeout=timeout, conditional=conditional,
+        window_start=window_start, validators_out=validators_out
+    ))
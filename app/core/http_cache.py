@@ -0,0 +1,151 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse, urlencode
+import config.settings as settings
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+CACHE_PATH = os.path.join(DATA_DIR, 'http_cache.db')
+
+HTTP_CACHE = getattr(settings, 'HTTP_CACHE', True)
+# Seconds a response stays fresh, by "host/path" prefix (longest match wins).
+# Anything not listed (login pages, yfinance) is never cached.
+HTTP_CACHE_TTLS = getattr(settings, 'HTTP_CACHE_TTLS', {})
+# Rows older than this are dropped when the cache is opened
+HTTP_CACHE_RETENTION = getattr(settings, 'HTTP_CACHE_RETENTION', 7 * 86400)
+
+# Cache-busting parameters that must not be part of the key (Jisilu's timestamp)
+IGNORED_PARAMS = {'___jsl'}
+
+_conn = None
+_lock = threading.Lock()
+# Command-line overrides (see configure)
+_enabled = HTTP_CACHE
+_max_age = None
+
+def configure(enabled=None, max_age=None):
+    """--no-cache turns the cache off; --max-age N replaces every per-source TTL with N seconds."""
+    global _enabled, _max_age
+    if enabled is not None:
+        _enabled = enabled
+    _max_age = max_age
+
+def ttl_for(url):
+    """Freshness lifetime for the URL in seconds (0 = not cacheable)."""
+    parsed = urlparse(url)
+    target = parsed.netloc + parsed.path
+    best, ttl = -1, 0
+    for prefix, seconds in HTTP_CACHE_TTLS.items():
+        if target.startswith(prefix) and len(prefix) > best:
+            best, ttl = len(prefix), seconds
+    if ttl and _max_age is not None:
+        return _max_age
+    return ttl
+
+def _normalize(value):
+    if value is None:
+        return ''
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    if isinstance(value, str):
+        return value
+    items = value.items() if isinstance(value, dict) else value
+    return urlencode(sorted((str(k), str(v)) for k, v in items if k not in IGNORED_PARAMS))
+
+def cache_key(method, url, params=None, data=None, json_body=None):
+    """Stable key for method + URL + params/body, ignoring cache-busting parameters."""
+    parts = [method.upper(), url, _normalize(params), _normalize(data),
+             json.dumps(json_body, sort_keys=True) if json_body is not None else '']
+    return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()
+
+class CachedResponse:
+    """The subset of the requests/curl_cffi Response API the collectors use."""
+
+    from_cache = True
+
+    def __init__(self, url, status_code, headers, content, encoding=None, fetched_at=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.fetched_at = fetched_at
+        self.ok = status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError(f"HTTP {self.status_code} for {self.url}")
+
+def _db():
+    global _conn
+    if _conn is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        _conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                status INTEGER,
+                headers TEXT,
+                encoding TEXT,
+                body BLOB,              -- zlib-compressed response body
+                fetched_at REAL
+            )
+        ''')
+        with _conn:
+            _conn.execute("DELETE FROM http_cache WHERE fetched_at < ?", (time.time() - HTTP_CACHE_RETENTION,))
+    return _conn
+
+def close_cache():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+atexit.register(close_cache)
+
+def lookup(key, url):
+    """The stored response if it is still fresh for this URL's TTL, else None."""
+    ttl = ttl_for(url)
+    if not (_enabled and ttl):
+        return None
+    with _lock:
+        row = _db().execute(
+            "SELECT status, headers, encoding, body, fetched_at FROM http_cache WHERE key = ?", (key,)
+        ).fetchone()
+    if not row or time.time() - row[4] > ttl:
+        return None
+    from requests.structures import CaseInsensitiveDict
+    status, headers, encoding, body, fetched_at = row
+    return CachedResponse(url, status, CaseInsensitiveDict(json.loads(headers)), zlib.decompress(body), encoding, fetched_at)
+
+def store(key, url, response):
+    """Saves a successful response for a cacheable URL."""
+    if not (_enabled and ttl_for(url)) or response.status_code != 200:
+        return
+    headers = {k: v for k, v in response.headers.items() if k.lower() in ('content-type', 'etag', 'last-modified')}
+    encoding = getattr(response, 'encoding', None)
+    body = zlib.compress(response.content, 6)
+    with _lock:
+        conn = _db()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_cache (key, url, status, headers, encoding, body, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, response.status_code, json.dumps(headers), encoding, body, time.time())
+            )
@@ -0,0 +1,125 @@
+import threading
+import time
+from urllib.parse import urlparse
+import config.settings as settings
+from app.core.rate_limit import get_host_limiter
+from app.core import http_cache
+
+# urllib3 only decodes Brotli when one of these is installed; never advertise
+# an encoding we cannot decode
+try:
+    import brotli  # noqa: F401
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+ACCEPT_ENCODING = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+HTTP_TIMEOUT = getattr(settings, 'HTTP_TIMEOUT', 20)
+HTTP_POOL_SIZE = getattr(settings, 'HTTP_POOL_SIZE', 4)
+
+_sessions = {}
+_stats = {}
+_lock = threading.Lock()
+
+def host_of(url):
+    return urlparse(url).netloc
+
+def get_session(url, impersonate=None):
+    """
+    Keep-alive session for the URL's host, created once per process.
+    `impersonate` returns a curl_cffi session with that browser fingerprint
+    (it negotiates compression itself); otherwise a pooled requests.Session.
+    """
+    key = (host_of(url), impersonate)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            if impersonate:
+                from curl_cffi import requests as curl_requests
+                session = curl_requests.Session(impersonate=impersonate)
+            else:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+            _sessions[key] = session
+    return session
+
+def _record(host, elapsed, size, error=False, cached=False):
+    with _lock:
+        entry = _stats.setdefault(host, {'requests': 0, 'cached': 0, 'errors': 0, 'seconds': 0.0, 'bytes': 0})
+        if cached:
+            entry['cached'] += 1
+            return
+        entry['requests'] += 1
+        entry['errors'] += int(error)
+        entry['seconds'] += elapsed
+        entry['bytes'] += size
+
+def request(method, url, session=None, impersonate=None, throttle=True, cache=True, validate=None, **kwargs):
+    """
+    Sends a request on the pooled session for the host (or the given `session`,
+    e.g. the logged-in Jisilu one) with a default timeout, paced by the
+    per-host rate limiter. Latency and body size are recorded per host.
+
+    Responses for sources listed in HTTP_CACHE_TTLS are served from / saved to
+    the on-disk cache (a CachedResponse is returned on a hit). `session` may be
+    a zero-argument callable so that a login only happens on a cache miss;
+    `validate(response)` returning False keeps a response out of the cache.
+    """
+    host = host_of(url)
+    key = None
+    if cache:
+        key = http_cache.cache_key(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+        cached = http_cache.lookup(key, url)
+        if cached is not None:
+            _record(host, 0.0, len(cached.content), cached=True)
+            return cached
+
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    if callable(session):
+        session = session()
+    session = session or get_session(url, impersonate)
+    limiter = get_host_limiter() if throttle else None
+    if limiter:
+        limiter.wait(url)
+
+    started = time.perf_counter()
+    try:
+        response = session.request(method, url, **kwargs)
+    except Exception:
+        _record(host, time.perf_counter() - started, 0, error=True)
+        raise
+    _record(host, time.perf_counter() - started, len(response.content), error=response.status_code >= 400)
+
+    if limiter:
+        limiter.record(url, response.status_code, response.headers.get('Retry-After'))
+    if key and (validate is None or validate(response)):
+        http_cache.store(key, url, response)
+    return response
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+def print_http_stats():
+    """Per-host request count, average latency, bytes received and cache hits so far."""
+    with _lock:
+        rows = sorted(_stats.items())
+    if not rows:
+        return
+    print("\n[STATS] HTTP requests by host:")
+    for host, entry in rows:
+        avg_ms = entry['seconds'] / entry['requests'] * 1000 if entry['requests'] else 0.0
+        errors = f", {entry['errors']} errors" if entry['errors'] else ""
+        print(f"  {host:<32} {entry['requests']:>4} req  avg {avg_ms:7.1f} ms  {entry['bytes'] / 1024:9.1f} KB  "
+              f"{entry['cached']:>4} cached{errors}")
@@ -1,25 +1,74 @@
 import json
 import os
+import threading
 import time
-from dotenv import load_dotenv
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import pad
-from curl_cffi import requests # 使用 curl_cffi 绕过 TLS 指纹识别
-
-# 尝试导入 ddddocr
-try:
-    import ddddocr
-    HAS_DDDDOCR = True
-except ImportError:
-    HAS_DDDDOCR = False
+from concurrent.futures import ThreadPoolExecutor
+import config.settings as settings
+from app.core import http_client
+
+# curl_cffi / Crypto / ddddocr 较重，只在真正访问集思录时才导入
 
 SESSION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'sessions')
 JSL_SESSION_FILE = os.path.join(SESSION_DIR, 'jsl_session.json')
 
-if not os.path.exists(SESSION_DIR):
-    os.makedirs(SESSION_DIR)
+# 登录状态缓存有效期 (秒)；期内不再访问首页检查登录
+JSL_LOGIN_TTL = getattr(settings, 'JSL_LOGIN_TTL', 1800)
+
+# 数据接口在未登录 / 登录过期时的特征
+LOGIN_REQUIRED_MARKER = '登录查看'
+LOGIN_REQUIRED_STATUS = (401, 403)
+
+# 验证码最多识别 / 提交次数
+JSL_CAPTCHA_ATTEMPTS = getattr(settings, 'JSL_CAPTCHA_ATTEMPTS', 3)
+
+_ddddocr = None
+_ocr = None
+# OCR 模型加载与识别都在这个单线程里完成：只加载一次，且不会被并发调用
+_ocr_executor = None
+_ocr_lock = threading.Lock()
+
+def load_ddddocr():
+    """按需导入 ddddocr，未安装时返回 None"""
+    global _ddddocr
+    if _ddddocr is None:
+        try:
+            import ddddocr
+            _ddddocr = ddddocr
+        except ImportError:
+            _ddddocr = False
+    return _ddddocr or None
+
+def _get_ocr():
+    """进程内共享的 OCR 实例，首次调用时加载 ONNX 模型 (只在 OCR 线程中调用)"""
+    global _ocr
+    if _ocr is None:
+        ddddocr = load_ddddocr()
+        if ddddocr is None:
+            return None
+        _ocr = ddddocr.DdddOcr(show_ad=False)
+    return _ocr
+
+def _submit_ocr(fn, *args):
+    global _ocr_executor
+    with _ocr_lock:
+        if _ocr_executor is None:
+            _ocr_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='jsl-ocr')
+    return _ocr_executor.submit(fn, *args)
+
+def preload_ocr():
+    """在后台加载 OCR 模型 (与登录请求、验证码下载并行)，返回 Future"""
+    return _submit_ocr(lambda: _get_ocr() is not None)
+
+def recognize_captcha(image_bytes):
+    """在 OCR 线程中识别验证码，ddddocr 不可用时返回 None"""
+    def classify():
+        ocr = _get_ocr()
+        return ocr.classification(image_bytes) if ocr is not None else None
+    return _submit_ocr(classify).result()
 
 def jsl_aes_encrypt(text: str) -> str:
+    from Crypto.Cipher import AES
+    from Crypto.Util.Padding import pad
     key = b'397151C04723421F'
     cipher = AES.new(key, AES.MODE_ECB)
     padded_data = pad(text.encode('utf-8'), AES.block_size, style='pkcs7')
@@ -28,6 +77,8 @@ def jsl_aes_encrypt(text: str) -> str:
 
 class JisiluSession:
     def __init__(self):
+        from dotenv import load_dotenv
+        from curl_cffi import requests # 使用 curl_cffi 绕过 TLS 指纹识别
         load_dotenv()
         self.username = os.getenv('JISILU_USERNAME')
         self.password = os.getenv('JISILU_PASSWORD')
@@ -38,6 +89,26 @@ class JisiluSession:
             "Accept": "application/json, text/javascript, */*; q=0.01",
             "Referer": "https://www.jisilu.cn/account/login/"
         })
+        # 登录状态缓存：在此时间点之前视为已登录
+        self.valid_until = 0.0
+
+    def is_session_valid(self) -> bool:
+        return time.time() < self.valid_until
+
+    def mark_valid(self, since=None):
+        self.valid_until = (since or time.time()) + JSL_LOGIN_TTL
+
+    def invalidate(self):
+        self.valid_until = 0.0
+
+    def save_cookies(self):
+        os.makedirs(SESSION_DIR, exist_ok=True)
+        with open(JSL_SESSION_FILE, 'w') as f:
+            # 获取字典格式的 cookies
+            cookies = {}
+            for k, v in self.session.cookies.items():
+                cookies[k] = v
+            json.dump({'cookies': cookies, 'timestamp': time.time()}, f)
 
     def is_logged_in(self) -> bool:
         try:
@@ -52,17 +123,16 @@ class JisiluSession:
 
     def get_captcha(self):
         """获取验证码内容"""
-        if not HAS_DDDDOCR:
-            print("[WARNING] 未检测到 ddddocr 库，无法自动识别验证码。请运行 'pip install ddddocr'。")
-            return None
-        
         try:
             # 这里的 URL 需要根据集思录实际情况，通常是 captcha 接口
             captcha_url = f"https://www.jisilu.cn/account/captcha/?{int(time.time()*1000)}"
             res = self.session.get(captcha_url, timeout=10)
             
-            ocr = ddddocr.DdddOcr(show_ad=False)
-            res_text = ocr.classification(res.content)
+            # 模型已由 preload_ocr 在后台加载，这里只等待识别结果
+            res_text = recognize_captcha(res.content)
+            if res_text is None:
+                print("[WARNING] 未检测到 ddddocr 库，无法自动识别验证码。请运行 'pip install ddddocr'。")
+                return None
             print(f"[INFO] 验证码自动识别结果: {res_text}")
             return res_text
         except Exception as e:
@@ -80,8 +150,17 @@ class JisiluSession:
                 for k, v in cookie_dict.items():
                     self.session.cookies.set(k, v)
                 
+                # Cookie 仍在缓存有效期内：直接使用，过期由数据接口的返回发现
+                saved_at = data.get('timestamp') or 0
+                if cookie_dict and time.time() - saved_at < JSL_LOGIN_TTL:
+                    self.mark_valid(since=saved_at)
+                    print(f"[INFO] 集思录 Cookie 在有效期内 ({(time.time() - saved_at) / 60:.0f} 分钟前验证)，跳过登录检查")
+                    return True
+                
                 if self.is_logged_in():
                     print("[INFO] 集思录已通过 Cookie 登录成功")
+                    self.mark_valid()
+                    self.save_cookies()
                     return True
                 else:
                     print("[INFO] Cookie 已失效，将尝试重新登录")
@@ -95,6 +174,9 @@ class JisiluSession:
         
         print(f"[INFO] 正在尝试登录账号: {self.username}")
         
+        # 后台加载验证码模型，与下面的网络请求并行
+        preload_ocr()
+        
         # 先访问登录页获取基础 Cookie
         self.session.get("https://www.jisilu.cn/account/login/")
         
@@ -116,40 +198,89 @@ class JisiluSession:
         except:
             pass
 
-        # 如果需要验证码或者登录失败，尝试带验证码再次登录
-        if res_data.get('errno') != 0:
+        # 如果需要验证码或者登录失败，尝试带验证码再次登录 (最多 JSL_CAPTCHA_ATTEMPTS 次)
+        attempt = 0
+        while res_data.get('errno') != 0 and attempt < JSL_CAPTCHA_ATTEMPTS:
+            attempt += 1
             seccode = self.get_captcha()
-            if seccode:
-                payload["seccode_verify"] = seccode
-                # 重新请求
-                res = self.session.post(login_url, data=payload)
-                try:
-                    res_data = res.json()
-                except:
-                    pass
+            if not seccode:
+                break
+            payload["seccode_verify"] = seccode
+            # 重新请求
+            res = self.session.post(login_url, data=payload)
+            try:
+                res_data = res.json()
+            except:
+                res_data = {}
+            if res_data.get('errno') != 0:
+                print(f"[INFO] 验证码登录未通过 ({attempt}/{JSL_CAPTCHA_ATTEMPTS}): {res_data.get('err') or res_data}")
 
         # 最终校验
         if res_data.get('errno') == 0 or res_data.get('status') == 'ok' or self.is_logged_in():
             print("[SUCCESS] 集思录登录成功！")
             # 保存新 Cookie
-            with open(JSL_SESSION_FILE, 'w') as f:
-                # 获取字典格式的 cookies
-                cookies = {}
-                for k, v in self.session.cookies.items():
-                    cookies[k] = v
-                json.dump({'cookies': cookies, 'timestamp': time.time()}, f)
+            self.save_cookies()
+            self.mark_valid()
             return True
         else:
             print(f"[ERROR] 登录失败: {res_data}")
             return False
 
-    def get_session(self) -> requests.Session:
+    def get_session(self):
         return self.session
 
-jsl_session_manager = JisiluSession()
+_jsl_session_manager = None
+
+def get_jsl_session_manager() -> JisiluSession:
+    """进程内单例，首次使用时才创建 curl 会话"""
+    global _jsl_session_manager
+    if _jsl_session_manager is None:
+        _jsl_session_manager = JisiluSession()
+    return _jsl_session_manager
+
+def __getattr__(name):
+    # 兼容旧代码中的 `from app.core.jsl_session import jsl_session_manager`
+    if name == 'jsl_session_manager':
+        return get_jsl_session_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_jsl_session():
-    # 每次获取前，如果内存中的 session 未登录，则尝试登录（优先使用本地 Cookie）
-    if not jsl_session_manager.is_logged_in():
-        jsl_session_manager.login(force=False)
+    jsl_session_manager = get_jsl_session_manager()
+    # 登录状态缓存过期时才尝试登录（优先使用本地 Cookie），不再每次访问首页
+    if not jsl_session_manager.is_session_valid():
+        if not jsl_session_manager.login(force=False):
+            # 登录失败也缓存检查结果，避免每次调用都重复访问首页；数据接口会再次触发登录
+            jsl_session_manager.mark_valid()
     return jsl_session_manager.get_session()
+
+def is_login_expired(response) -> bool:
+    """数据接口返回是否表明登录已失效"""
+    if response.status_code in LOGIN_REQUIRED_STATUS:
+        return True
+    try:
+        return LOGIN_REQUIRED_MARKER in response.text
+    except Exception:
+        return False
+
+def jsl_request(method, url, **kwargs):
+    """
+    使用已登录会话请求集思录数据接口 (按 HOST_RATE_LIMITS 限速)。
+    若返回表明登录已失效，则重新登录一次并重试。
+    """
+    # 会话在缓存未命中时才获取 (可能触发登录)；登录失效的返回不写入缓存
+    response = http_client.request(method, url, session=get_jsl_session,
+                                   validate=lambda r: not is_login_expired(r), **kwargs)
+    if not is_login_expired(response):
+        return response
+
+    print("[INFO] 集思录登录已失效，重新登录后重试")
+    jsl_session_manager = get_jsl_session_manager()
+    jsl_session_manager.invalidate()
+    if not jsl_session_manager.login(force=True):
+        return response
+    response = http_client.request(method, url, session=jsl_session_manager.get_session(),
+                                   validate=lambda r: not is_login_expired(r), **kwargs)
+    if is_login_expired(response):
+        print("[WARNING] 重新登录后数据仍需登录查看")
+        jsl_session_manager.invalidate()
+    return response
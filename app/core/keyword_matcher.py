@@ -0,0 +1,90 @@
+from collections import deque
+
+def is_word_char(c):
+    """Mirrors the regex \\w class used by the original \\b keyword rule."""
+    return c.isalnum() or c == '_'
+
+def is_short_ascii_term(kw_lower):
+    """
+    Rule: For very short English alphanumeric keywords (e.g., 'AI', 'AR'),
+    use whole-word matching. isascii() keeps Chinese keywords on substring matching.
+    """
+    return len(kw_lower) <= 3 and kw_lower.isalnum() and kw_lower.isascii()
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over lower-cased keywords, built once and reused.
+    Each keyword carries a payload (e.g. its category); short ASCII terms are
+    only reported when they sit on word boundaries.
+    Matching costs one pass over the text, independent of the keyword count.
+    """
+
+    def __init__(self, keywords, whole_words=True):
+        # keywords: iterable of (keyword, payload); whole_words=False turns
+        # the short-term word-boundary rule off (pure substring matching)
+        self.goto = [{}]
+        self.fail = [0]
+        # outputs[state] = list of (length, whole_word, payload)
+        self.outputs = [[]]
+        self.size = 0
+        for keyword, payload in keywords:
+            kw_lower = (keyword or '').lower()
+            if not kw_lower:
+                continue
+            whole_word = whole_words and is_short_ascii_term(kw_lower)
+            self._add(kw_lower, (len(kw_lower), whole_word, payload))
+            self.size += 1
+        self._build()
+
+    def _add(self, word, output):
+        state = 0
+        for ch in word:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = nxt
+        self.outputs[state].append(output)
+
+    def _build(self):
+        # Breadth-first: depth-1 states fail to the root, deeper ones to the
+        # longest proper suffix that is also a keyword prefix
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0) if state else 0
+                self.outputs[nxt] = self.outputs[nxt] + self.outputs[self.fail[nxt]]
+
+    def iter_matches(self, text):
+        """Yields the payload of every keyword occurrence in `text` (already lower-cased)."""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+        last = len(text) - 1
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, whole_word, payload in outputs[state]:
+                if whole_word:
+                    start = i - length + 1
+                    if start > 0 and is_word_char(text[start - 1]):
+                        continue
+                    if i < last and is_word_char(text[i + 1]):
+                        continue
+                yield payload
+
+    def matches_any(self, text):
+        for _ in self.iter_matches(text):
+            return True
+        return False
+
+    def payloads(self, text):
+        return set(self.iter_matches(text))
@@ -1,10 +1,10 @@
 import smtplib
 import os
-import markdown
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.header import Header
 import config.settings as config
+from app.core.renderer import REPORT_CSS
 
 def send_report_email(report_path):
     """Sends the generated markdown report via Gmail SMTP as a styled HTML email."""
@@ -41,25 +41,14 @@ def send_report_email(report_path):
     message.attach(text_part)
 
     # 2. HTML version with Premium CSS Styling
+    import markdown
     html_content = markdown.markdown(content, extensions=['tables', 'fenced_code'])
     
     styled_html = f"""
     <html>
     <head>
     <style>
-        body {{ font-family: 'Segoe UI', Roboto, Helvetica, Arial, sans-serif; color: #333; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }}
-        h1 {{ color: #1a73e8; border-bottom: 2px solid #eee; padding-bottom: 10px; }}
-        h2 {{ color: #202124; margin-top: 30px; border-left: 4px solid #1a73e8; padding-left: 10px; }}
-        h3 {{ color: #444; margin-bottom: 15px; }}
-        h4 {{ color: #000; margin-top: 15px; margin-bottom: 5px; font-size: 1.1em; }}
-        p {{ margin-top: 0; margin-bottom: 10px; }}
-        table {{ border-collapse: collapse; width: 100%; margin: 20px 0; box-shadow: 0 1px 3px rgba(0,0,0,0.1); }}
-        th {{ background-color: #f8f9fa; color: #5f6368; font-weight: bold; border: 1px solid #dee2e6; padding: 12px; text-align: left; }}
-        td {{ border: 1px solid #dee2e6; padding: 12px; }}
-        tr:nth-child(even) {{ background-color: #fcfcfc; }}
-        blockquote {{ margin: 20px 0; padding: 10px 20px; border-left: 5px solid #1a73e8; background: #f0f7ff; color: #555; }}
-        code {{ background-color: #f4f4f4; padding: 2px 4px; border-radius: 4px; font-family: 'Courier New', monospace; }}
-        .footer {{ margin-top: 40px; border-top: 1px solid #eee; padding-top: 20px; font-size: 12px; color: #888; text-align: center; }}
+    {REPORT_CSS}
     </style>
     </head>
     <body>
@@ -0,0 +1,188 @@
+import random
+import re
+import zlib
+
+# numpy is optional: it only vectorises signature computation
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Mersenne prime for the (a * x + b) mod p permutation family; small enough
+# that a * x + b fits in 64 bits, so the numpy and pure-Python paths agree
+_PRIME = (1 << 31) - 1
+# Runs of CJK characters (split into character bigrams below) or words
+_TOKEN_RE = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]+|[^\W_]+')
+_CJK_RE = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]')
+# Function words that carry no story identity (English / French)
+_STOPWORDS = frozenset('''
+    a an and are as at be but by for from has have in into is it its of on or over said says
+    than that the this to up was were will with after amid
+    au aux d de des du en et l la le les pour par sur un une
+'''.split())
+# Limits comparisons inside one LSH bucket so degenerate buckets stay linear
+MAX_BUCKET_COMPARISONS = 32
+
+# Default Jaccard threshold, tuned for precision on 60 hand-labelled headline
+# pairs (30 reworded duplicates, 30 same-topic different stories, e.g.
+# "Stocks fall as inflation data surprises" / "Stocks rise as inflation data
+# cools"): at 0.4 no different stories are merged (precision 100%) and 8 of
+# the 30 duplicates are (recall 27%); 0.35 merges 2 wrong pairs for 9/30. The
+# former 4-character stems at 0.3 merged 14 of the 30 different stories.
+DEFAULT_THRESHOLD = 0.4
+# Texts this short (a title without summary) share too few words for the
+# default; they need a near-identical wording instead
+SHORT_TEXT_SHINGLES = 8
+SHORT_TEXT_THRESHOLD = 0.75
+# Headlines moving in opposite directions, or quoting different figures, are
+# separate stories however many words they share
+_UP_WORDS = frozenset('''
+    rise rises rose risen rising jump jumps jumped surge surges surged gain gains gained climb climbs
+    climbed higher raise raises raised hike hikes hiked lift lifts lifted soar soars soared rally
+    rallies rallied increase increases increased boost boosts beat beats
+'''.split())
+_DOWN_WORDS = frozenset('''
+    fall falls fell fallen falling drop drops dropped slump slumps slumped slide slides slid decline
+    declines declined lower lowers lowered cut cuts plunge plunges plunged sink sinks sank tumble
+    tumbles tumbled decrease decreases reduce reduces miss misses
+'''.split())
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)?')
+
+def article_title(article):
+    return article.get('translated_title') or article.get('title') or ''
+
+def article_text(article, summary_chars=200):
+    """Text used for near-duplicate detection: translated title plus the start of the summary."""
+    summary = article.get('translated_summary') or ''
+    return f"{article_title(article)} {summary[:summary_chars]}"
+
+def tokenize(text):
+    """Content words; CJK runs become overlapping character bigrams."""
+    tokens = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if _CJK_RE.match(run):
+            tokens.extend(run[i:i + 2] for i in range(max(1, len(run) - 1)))
+        elif run not in _STOPWORDS:
+            tokens.append(run)
+    return tokens
+
+def headline_features(title):
+    """(numbers quoted, direction: 1 up / -1 down / 0 none or mixed) of a headline."""
+    words = set(_TOKEN_RE.findall(title.lower()))
+    up, down = bool(words & _UP_WORDS), bool(words & _DOWN_WORDS)
+    return frozenset(_NUMBER_RE.findall(title)), (up and not down) - (down and not up)
+
+def conflicting(features_a, features_b):
+    """True when two headlines quote disjoint figures or move in opposite directions."""
+    (numbers_a, direction_a), (numbers_b, direction_b) = features_a, features_b
+    if numbers_a and numbers_b and not numbers_a & numbers_b:
+        return True
+    return direction_a * direction_b < 0
+
+def shingles(text, k=1):
+    """
+    Set of hashed k-token shingles (CRC32 mod p, so results are stable across runs).
+    Single words by default: reworded headlines share words, rarely word sequences
+    (word pairs lowered recall further without removing the wrong merges).
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return set()
+    if len(tokens) < k:
+        return {zlib.crc32(' '.join(tokens).encode('utf-8')) % _PRIME}
+    return {
+        zlib.crc32(' '.join(tokens[i:i + k]).encode('utf-8')) % _PRIME
+        for i in range(len(tokens) - k + 1)
+    }
+
+def choose_bands(num_perm, threshold):
+    """Picks (bands, rows) whose LSH S-curve threshold (1/b)^(1/r) is closest to `threshold`."""
+    best = (1, num_perm)
+    best_error = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best_error is None or error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+class MinHashLSH:
+    """
+    MinHash signatures over token shingles with locality-sensitive hashing buckets.
+    Candidate pairs share at least one band; they are confirmed when the
+    estimated Jaccard similarity reaches `threshold`.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=128, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        rng = random.Random(seed)
+        self.perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        if HAS_NUMPY:
+            self._a = np.array([a for a, _ in self.perms], dtype=np.uint64)[:, None]
+            self._b = np.array([b for _, b in self.perms], dtype=np.uint64)[:, None]
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return None
+        if HAS_NUMPY:
+            hashes = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))[None, :]
+            return ((self._a * hashes + self._b) % _PRIME).min(axis=1).tolist()
+        hashes = list(shingle_set)
+        return [min([(a * h + b) % _PRIME for h in hashes]) for a, b in self.perms]
+
+    def similarity(self, sig_a, sig_b):
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / self.num_perm
+
+    def cluster(self, texts, titles=None):
+        """
+        Groups near-duplicate texts. Returns a list with, for each text, the index
+        of the first text in its cluster (None for texts without any shingles).
+        `titles` (default: the texts) are checked for conflicting figures or
+        directions before two texts are merged.
+        """
+        parent = list(range(len(texts)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                # The earliest article stays the representative
+                parent[max(ri, rj)] = min(ri, rj)
+
+        shingle_sets = [shingles(t) for t in texts]
+        signatures = [self.signature(s) for s in shingle_sets]
+        features = [headline_features(t) for t in (titles if titles is not None else texts)]
+
+        def required(i, j):
+            if min(len(shingle_sets[i]), len(shingle_sets[j])) < SHORT_TEXT_SHINGLES:
+                return max(self.threshold, SHORT_TEXT_THRESHOLD)
+            return self.threshold
+
+        buckets = {}
+        for i, sig in enumerate(signatures):
+            if sig is None:
+                continue
+            for band in range(self.bands):
+                start = band * self.rows
+                key = (band, tuple(sig[start:start + self.rows]))
+                members = buckets.setdefault(key, [])
+                for j in members[-MAX_BUCKET_COMPARISONS:]:
+                    if (find(i) != find(j) and not conflicting(features[i], features[j])
+                            and self.similarity(sig, signatures[j]) >= required(i, j)):
+                        union(i, j)
+                members.append(i)
+
+        return [find(i) if sig is not None else None for i, sig in enumerate(signatures)]
+
+def near_duplicate_keys(articles, threshold=DEFAULT_THRESHOLD, num_perm=128):
+    """Cluster keys usable in place of topic_key: articles sharing a key are near-duplicates."""
+    lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
+    return lsh.cluster([article_text(a) for a in articles], titles=[article_title(a) for a in articles])
@@ -1,20 +1,75 @@
 
+import atexit
+import re
 import sqlite3
 import os
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
+from app.core.db import add_column_if_missing
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 DB_NAME = 'news_data.db'
 DB_PATH = os.path.join(DATA_DIR, DB_NAME)
 
+# pub_date is stored as a UTC timestamp string so it sorts and compares lexically
+PUB_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Set to False when the SQLite build lacks FTS5 (see init_news_fts)
+HAS_FTS = True
+# Set to False when FTS5 lacks the trigram tokenizer (SQLite < 3.34, see init_news_cjk_fts)
+HAS_CJK_FTS = True
+
+# Queries containing CJK text go to the trigram index: unicode61 treats a
+# whole run of CJK characters as one token, so words inside it never match
+_CJK_RE = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]')
+
+# Long-lived process-wide connection (see get_news_db)
+_shared_conn = None
+_schema_ready = False
+_lock = threading.RLock()
+
 def get_news_db_connection():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
     return sqlite3.connect(DB_PATH)
 
-def init_news_db():
-    conn = get_news_db_connection()
+def get_news_db():
+    """
+    Returns the shared connection to news_data.db, opened once per process in
+    WAL mode; the schema is checked on first use only.
+    Callers must hold `news_db_lock()` while using it from several threads.
+    """
+    global _shared_conn
+    with _lock:
+        if _shared_conn is None:
+            if not os.path.exists(DATA_DIR):
+                os.makedirs(DATA_DIR)
+            _shared_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+            _shared_conn.execute("PRAGMA journal_mode=WAL")
+            _shared_conn.execute("PRAGMA synchronous=NORMAL")
+        if not _schema_ready:
+            init_news_db(_shared_conn)
+        return _shared_conn
+
+def news_db_lock():
+    return _lock
+
+def close_news_db():
+    global _shared_conn
+    with _lock:
+        if _shared_conn is not None:
+            _shared_conn.close()
+            _shared_conn = None
+
+atexit.register(close_news_db)
+
+def init_news_db(conn=None):
+    """Creates the news tables. Idempotent; runs on `conn` or on a short-lived connection."""
+    global _schema_ready
+    own_conn = conn is None
+    if own_conn:
+        conn = get_news_db_connection()
     cursor = conn.cursor()
     
     # News Articles Table
@@ -34,51 +89,380 @@ def init_news_db():
         )
     ''')
     
+    # Window queries (--incremental, --search --since) filter on the publication time
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_articles_pub_date ON news_articles(pub_date)")
+    
+    # Conditional GET validators per feed (ETag / Last-Modified); window_start is
+    # the oldest pub_date the run that stored them kept in news_articles
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feed_cache (
+            feed_url TEXT PRIMARY KEY,
+            etag TEXT,
+            modified TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            window_start TEXT
+        )
+    ''')
+    add_column_if_missing(cursor, 'feed_cache', 'window_start', 'TEXT')
+    
+    # Translation memory (see app/core/translation_cache.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS translation_cache (
+            text_hash TEXT,
+            source_lang TEXT,
+            target_lang TEXT,
+            translation TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_used_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (text_hash, source_lang, target_lang)
+        )
+    ''')
+    
+    init_news_fts(cursor)
+    init_news_cjk_fts(cursor)
+    
     conn.commit()
-    conn.close()
+    if own_conn:
+        conn.close()
+    _schema_ready = True
+
+def init_news_fts(cursor):
+    """
+    Full-text index over news_articles (external-content FTS5 table).
+    Triggers keep it in sync with every insert/update/delete, so
+    save_news_articles indexes new rows inside its own transaction.
+    """
+    global HAS_FTS
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_fts'"
+    ).fetchone()
+    if exists:
+        return
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE news_fts USING fts5(
+                title, translated_title, summary, translated_summary,
+                content='news_articles', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        HAS_FTS = False
+        print(f"[WARN] SQLite FTS5 unavailable, news search disabled: {e}")
+        return
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_articles_fts_ai AFTER INSERT ON news_articles BEGIN
+            INSERT INTO news_fts(rowid, title, translated_title, summary, translated_summary)
+            VALUES (new.id, new.title, new.translated_title, new.summary, new.translated_summary);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_articles_fts_ad AFTER DELETE ON news_articles BEGIN
+            INSERT INTO news_fts(news_fts, rowid, title, translated_title, summary, translated_summary)
+            VALUES ('delete', old.id, old.title, old.translated_title, old.summary, old.translated_summary);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_articles_fts_au AFTER UPDATE ON news_articles BEGIN
+            INSERT INTO news_fts(news_fts, rowid, title, translated_title, summary, translated_summary)
+            VALUES ('delete', old.id, old.title, old.translated_title, old.summary, old.translated_summary);
+            INSERT INTO news_fts(rowid, title, translated_title, summary, translated_summary)
+            VALUES (new.id, new.title, new.translated_title, new.summary, new.translated_summary);
+        END
+    ''')
+    # Index articles stored before the FTS table existed
+    cursor.execute("INSERT INTO news_fts(news_fts) VALUES ('rebuild')")
+
+def init_news_cjk_fts(cursor):
+    """
+    Trigram index over the original-language title/summary, for CJK searches
+    (any substring of 3+ characters via MATCH, shorter words via LIKE).
+    Kept in sync by triggers like news_fts.
+    """
+    global HAS_CJK_FTS
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_fts_cjk'"
+    ).fetchone()
+    if exists:
+        return
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE news_fts_cjk USING fts5(
+                title, summary,
+                content='news_articles', content_rowid='id',
+                tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        HAS_CJK_FTS = False
+        print(f"[WARN] SQLite trigram tokenizer unavailable, CJK news search disabled: {e}")
+        return
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_articles_fts_cjk_ai AFTER INSERT ON news_articles BEGIN
+            INSERT INTO news_fts_cjk(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_articles_fts_cjk_ad AFTER DELETE ON news_articles BEGIN
+            INSERT INTO news_fts_cjk(news_fts_cjk, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_articles_fts_cjk_au AFTER UPDATE ON news_articles BEGIN
+            INSERT INTO news_fts_cjk(news_fts_cjk, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+            INSERT INTO news_fts_cjk(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+        END
+    ''')
+    cursor.execute("INSERT INTO news_fts_cjk(news_fts_cjk) VALUES ('rebuild')")
+
+def load_feed_validators(window_start):
+    """
+    Returns {feed_url: {'etag': ..., 'modified': ...}} stored by previous runs
+    whose saved window reaches back to `window_start`: a 304 for those feeds
+    means everything they carry from `window_start` on is in news_articles.
+    """
+    with _lock:
+        rows = get_news_db().execute(
+            "SELECT feed_url, etag, modified FROM feed_cache WHERE window_start <= ?",
+            (format_pub_date(window_start),)
+        ).fetchall()
+    return {url: {'etag': etag, 'modified': modified} for url, etag, modified in rows}
+
+def save_feed_validators(validators, window_start):
+    """
+    Stores the latest validators; feeds without any validator are forgotten.
+    Call only once the run's articles from `window_start` on have been saved.
+    """
+    if not validators:
+        return
+    with _lock:
+        conn = get_news_db()
+        with conn:
+            for feed_url, v in validators.items():
+                if v.get('not_modified'):
+                    continue
+                if v.get('etag') or v.get('modified'):
+                    conn.execute('''
+                        INSERT OR REPLACE INTO feed_cache (feed_url, etag, modified, updated_at, window_start)
+                        VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)
+                    ''', (feed_url, v.get('etag'), v.get('modified'), format_pub_date(window_start)))
+                else:
+                    conn.execute("DELETE FROM feed_cache WHERE feed_url = ?", (feed_url,))
+
+def fetch_stored_translations(links, chunk_size=500):
+    """
+    Looks up articles that are already stored (by link, which is UNIQUE and indexed).
+    Returns {link: {'translated_title': ..., 'translated_summary': ...}}.
+    """
+    links = list({link for link in links if link})
+    if not links:
+        return {}
+
+    known = {}
+    with _lock:
+        cursor = get_news_db().cursor()
+        # Chunked to stay below SQLite's host parameter limit
+        for i in range(0, len(links), chunk_size):
+            chunk = links[i:i + chunk_size]
+            placeholders = ', '.join(['?'] * len(chunk))
+            cursor.execute(f'''
+                SELECT link, translated_title, translated_summary
+                FROM news_articles WHERE link IN ({placeholders})
+            ''', chunk)
+            for link, translated_title, translated_summary in cursor.fetchall():
+                if translated_title:
+                    known[link] = {
+                        'translated_title': translated_title,
+                        'translated_summary': translated_summary or ''
+                    }
+    return known
+
+def format_pub_date(published):
+    """datetime -> stored pub_date string (naive values are taken as UTC, like filter_articles)."""
+    if not published:
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published.astimezone(timezone.utc).strftime(PUB_DATE_FORMAT)
+
+def parse_pub_date(value):
+    """Stored pub_date string -> timezone-aware UTC datetime (None if empty/invalid)."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, PUB_DATE_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+def load_archived_articles(start_time, end_time):
+    """
+    Returns stored articles published within [start_time, end_time], newest first,
+    in the pipeline's article format (translations included). Undated entries
+    (which the live date filter always keeps) count from when they were stored.
+    """
+    start, end = format_pub_date(start_time), format_pub_date(end_time)
+    with _lock:
+        rows = get_news_db().execute('''
+            SELECT link, title, translated_title, summary, translated_summary,
+                   pub_date, category, source_name
+            FROM news_articles
+            WHERE (pub_date >= ? AND pub_date <= ?)
+               OR (pub_date IS NULL AND created_at >= ? AND created_at <= ?)
+            ORDER BY COALESCE(pub_date, created_at) DESC
+        ''', (start, end, start, end)).fetchall()
+    return [{
+        'link': link,
+        'title': title or '',
+        'translated_title': translated_title or title or '',
+        'summary': summary or '',
+        'translated_summary': translated_summary or '',
+        'published': parse_pub_date(pub_date),
+        'category': category,
+        'source_name': source_name,
+    } for link, title, translated_title, summary, translated_summary, pub_date, category, source_name in rows]
 
 def save_news_articles(articles):
     """
     Saves new articles to the database.
     Skips duplicates based on the link.
+    All rows go through one executemany in a single transaction on the shared
+    connection; returns the number of newly inserted articles (None if the
+    write failed).
     """
     if not articles:
-        return
+        return 0
 
-    init_news_db()
-    conn = get_news_db_connection()
-    cursor = conn.cursor()
-    
-    saved_count = 0
+    rows = []
     for article in articles:
         # article format from pipeline
-        # sources is a list of dicts, we take the first one for simplicity or join them
+        # sources is a list of dicts; the pipeline stores one row per fetched link (see main.articles_to_store)
         source_name = article['sources'][0]['name'] if article.get('sources') else 'Unknown'
         source_link = article['sources'][0]['link'] if article.get('sources') else ''
-        
+        rows.append((
+            article.get('link'),
+            article.get('title'),
+            article.get('translated_title'),
+            article.get('summary'),
+            article.get('translated_summary'),
+            format_pub_date(article.get('published')) or article.get('pub_date'),
+            article.get('category', 'Others'),
+            source_name,
+            source_link
+        ))
+
+    saved_count = 0
+    with _lock:
+        conn = get_news_db()
         try:
-            cursor.execute('''
-                INSERT OR IGNORE INTO news_articles 
-                (link, title, translated_title, summary, translated_summary, pub_date, category, source_name, source_link)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                article.get('link'),
-                article.get('title'),
-                article.get('translated_title'),
-                article.get('summary'),
-                article.get('translated_summary'),
-                article.get('pub_date'),
-                article.get('category', 'Others'),
-                source_name,
-                source_link
-            ))
-            if cursor.rowcount > 0:
-                saved_count += 1
+            with conn:
+                # rowcount sums direct changes only (ignored rows and FTS triggers excluded)
+                cursor = conn.executemany('''
+                    INSERT OR IGNORE INTO news_articles 
+                    (link, title, translated_title, summary, translated_summary, pub_date, category, source_name, source_link)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+            saved_count = cursor.rowcount
         except sqlite3.Error as e:
-            print(f"Error saving article {article.get('link')}: {e}")
-            
-    conn.commit()
-    conn.close()
-    if saved_count > 0:
-        print(f"[*] Saved {saved_count} new unique articles to news_data.db")
+            print(f"Error saving {len(rows)} articles: {e}")
+            return None
+
+    ignored_count = len(rows) - saved_count
+    if saved_count > 0 or ignored_count > 0:
+        print(f"[*] Saved {saved_count} new unique articles to news_data.db ({ignored_count} already stored)")
     return saved_count
+
+def _quote_fts_query(query):
+    """Turns free text into an FTS5 query of quoted terms (all must match)."""
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def _cjk_snippet(text, term, width=16):
+    """'...context [term] context...' around the first occurrence of `term`."""
+    text = ' '.join((text or '').split())
+    pos = text.lower().find(term.lower())
+    if pos < 0:
+        return text[:width * 2]
+    start, end = max(0, pos - width), pos + len(term) + width
+    return (('...' if start else '') + text[start:pos] + '[' + text[pos:pos + len(term)] + ']'
+            + text[pos + len(term):end] + ('...' if end < len(text) else ''))
+
+def search_news_cjk(query, since=None, limit=20):
+    """
+    Search of the original-language title/summary through the trigram index.
+    Terms of 3+ characters are ranked with bm25; a query with a shorter term
+    (most Chinese words are two characters) matches by substring, newest first.
+    """
+    terms = query.split()
+    ranked = all(len(term) >= 3 for term in terms)
+    date_expr = "COALESCE(NULLIF(a.pub_date, ''), a.created_at)"
+    if ranked:
+        sql = f'''
+            SELECT a.id, {date_expr} AS date, a.source_name, a.category, a.translated_title, a.title, a.link,
+                   a.summary, bm25(news_fts_cjk) AS score
+            FROM news_fts_cjk JOIN news_articles a ON a.id = news_fts_cjk.rowid
+            WHERE news_fts_cjk MATCH ?
+              AND (? IS NULL OR {date_expr} >= ?)
+            ORDER BY score
+            LIMIT ?
+        '''
+        params = [_quote_fts_query(query)]
+    else:
+        like = ' AND '.join("(c.title LIKE ? ESCAPE '\\' OR c.summary LIKE ? ESCAPE '\\')" for _ in terms)
+        sql = f'''
+            SELECT a.id, {date_expr} AS date, a.source_name, a.category, a.translated_title, a.title, a.link,
+                   a.summary, NULL AS score
+            FROM news_fts_cjk c JOIN news_articles a ON a.id = c.rowid
+            WHERE {like}
+              AND (? IS NULL OR {date_expr} >= ?)
+            ORDER BY date DESC
+            LIMIT ?
+        '''
+        params = []
+        for term in terms:
+            pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            params += [pattern, pattern]
+    with _lock:
+        rows = get_news_db().execute(sql, params + [since, since, limit]).fetchall()
+    columns = ['id', 'date', 'source_name', 'category', 'translated_title', 'title', 'link', 'snippet', 'score']
+    results = [dict(zip(columns, row)) for row in rows]
+    # Trigram snippet() cuts words mid-way; highlight the first term in the summary instead
+    for result in results:
+        result['snippet'] = _cjk_snippet(result['snippet'] or result['title'], terms[0])
+    return results
+
+def search_news(query, since=None, limit=20):
+    """
+    Full-text search over stored news, best matches first (bm25).
+    `since` is a 'YYYY-MM-DD' lower bound on the publication (or collection) date.
+    FTS5 query syntax is accepted; on a syntax error the terms are quoted instead.
+    Queries with CJK characters search the original text via the trigram
+    index (see search_news_cjk). Returns a list of dicts.
+    """
+    if not query or not query.strip():
+        return []
+    if _CJK_RE.search(query):
+        get_news_db()
+        if HAS_CJK_FTS:
+            return search_news_cjk(query, since=since, limit=limit)
+    sql = '''
+        SELECT a.id, COALESCE(NULLIF(a.pub_date, ''), a.created_at) AS date,
+               a.source_name, a.category, a.translated_title, a.title, a.link,
+               snippet(news_fts, 3, '[', ']', '...', 16) AS snippet,
+               bm25(news_fts) AS score
+        FROM news_fts JOIN news_articles a ON a.id = news_fts.rowid
+        WHERE news_fts MATCH ?
+          AND (? IS NULL OR COALESCE(NULLIF(a.pub_date, ''), a.created_at) >= ?)
+        ORDER BY score
+        LIMIT ?
+    '''
+    with _lock:
+        conn = get_news_db()
+        if not HAS_FTS:
+            return []
+        try:
+            rows = conn.execute(sql, (query, since, since, limit)).fetchall()
+        except sqlite3.OperationalError:
+            rows = conn.execute(sql, (_quote_fts_query(query), since, since, limit)).fetchall()
+    columns = ['id', 'date', 'source_name', 'category', 'translated_title', 'title', 'link', 'snippet', 'score']
+    return [dict(zip(columns, row)) for row in rows]
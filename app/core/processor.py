@@ -3,12 +3,24 @@ import os
 import re
 from datetime import datetime, timedelta, timezone
 from config.settings import BLOCKED_KEYWORDS, SHOW_IMAGES
+from app.core.keyword_matcher import KeywordMatcher
+import config.settings as settings
 from tqdm import tqdm
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CATEGORIES_PATH = os.path.join(BASE_DIR, 'config', 'categories.json')
+
+# Compiled matchers, rebuilt only when categories.json or the blocklist changes
+_matcher_cache = {}
+
+# Merge strategy: 'topic_key' (title prefix) or 'minhash' (near-duplicate detection)
+DEDUP_STRATEGY = getattr(settings, 'DEDUP_STRATEGY', 'topic_key')
+# 0.4: no wrong merges on the labelled pairs (see near_dup.DEFAULT_THRESHOLD)
+DEDUP_SIMILARITY_THRESHOLD = getattr(settings, 'DEDUP_SIMILARITY_THRESHOLD', 0.4)
+
 def load_categories():
     """Loads categorization keyword map from config/categories.json."""
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    config_path = os.path.join(base_dir, 'config', 'categories.json')
+    config_path = CATEGORIES_PATH
     
     if os.path.exists(config_path):
         try:
@@ -18,11 +30,51 @@ def load_categories():
             print(f"[WARN] Failed to load category config: {e}")
     return {}
 
+def _categories_version():
+    try:
+        stat = os.stat(CATEGORIES_PATH)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def get_category_matcher():
+    """
+    Returns (category names in priority order, matcher whose payload is the
+    category's index), or (None, None) without a category config.
+    Cached per categories.json version.
+    """
+    version = _categories_version()
+    cached = _matcher_cache.get('categories')
+    if cached and cached[0] == version:
+        return cached[1], cached[2]
+
+    categories = load_categories()
+    if not categories:
+        names, matcher = None, None
+    else:
+        names = [c for c in categories.keys() if c != "Others"]
+        matcher = KeywordMatcher(
+            (kw, index) for index, name in enumerate(names) for kw in categories[name]
+        )
+    _matcher_cache['categories'] = (version, names, matcher)
+    return names, matcher
+
+def get_blocklist_matcher():
+    """Returns the matcher for BLOCKED_KEYWORDS, cached per blocklist contents."""
+    version = tuple(BLOCKED_KEYWORDS)
+    cached = _matcher_cache.get('blocklist')
+    if cached and cached[0] == version:
+        return cached[1]
+    # The blocklist is pure substring matching, so the short-term word rule is off
+    matcher = KeywordMatcher(((kw, kw) for kw in BLOCKED_KEYWORDS), whole_words=False)
+    _matcher_cache['blocklist'] = (version, matcher)
+    return matcher
+
 def apply_keyword_categorization(articles):
     """Categorizes articles based on defined keywords with smart matching."""
     print("\n[Stage 3.5/5] Categorizing articles based on keywords...")
-    categories = load_categories()
-    if not categories:
+    category_names, matcher = get_category_matcher()
+    if matcher is None:
         for article in articles:
             article['category'] = 'Others'
         return articles
@@ -35,33 +87,12 @@ def apply_keyword_categorization(articles):
         
         assigned_category = "Others"
         
-        # Priority: Check keyword matches
-        found_match = False
-        for category, keywords in categories.items():
-            if category == "Others": continue
-            
-            matched = False
-            for kw in keywords:
-                kw_lower = kw.lower()
-                
-                # Rule: For very short English alphanumeric keywords (e.g., 'AI', 'AR'), 
-                # use whole-word matching. 
-                # Note: We use isascii() to ensure this doesn't kill Chinese keyword matching.
-                if len(kw_lower) <= 3 and kw_lower.isalnum() and kw_lower.isascii():
-                    pattern = rf'\b{re.escape(kw_lower)}\b'
-                    if re.search(pattern, text_to_search):
-                        matched = True
-                        break
-                # Rule: Substring match for Chinese or longer English terms
-                else:
-                    if kw_lower in text_to_search:
-                        matched = True
-                        break
-            
-            if matched:
-                assigned_category = category
-                found_match = True
-                break
+        # Priority: the first category (in config order) with any keyword match.
+        # Short ASCII terms use whole-word matching, everything else substring matching.
+        matched = matcher.payloads(text_to_search)
+        found_match = bool(matched)
+        if found_match:
+            assigned_category = category_names[min(matched)]
         
         # Secondary Logic: Special handling for specific sources (BBC, NYT)
         if not found_match and article.get('source_name') in ['anyfeeder', 'nytimes']:
@@ -71,10 +102,24 @@ def apply_keyword_categorization(articles):
     
     return articles
 
-def filter_articles(articles, days=None, start_date=None, end_date=None):
+def clean_summary(article):
     """
-    Filters articles within the specified time range and 
-    removes articles containing blocked keywords.
+    Optional: Cleanup summaries for a cleaner report (and save translation tokens)
+    """
+    summary = article.get('summary', '')
+    if summary:
+        # 1. Remove Markdown image syntax: ![alt](url)
+        summary = re.sub(r'!\[[^\]]*\]\([^\)]*\)', '', summary)
+        # 2. Remove ALL HTML tags (including <b>, <strong>, <img>, <a> etc.)
+        # This ensures the report is plain text and not bolded by source styles
+        summary = re.sub(r'<[^>]+>', '', summary)
+        # 3. Cleanup escaping/excess whitespace
+        article['summary'] = summary.strip()
+
+def iter_filtered_articles(articles, days=None, start_date=None, end_date=None):
+    """
+    Streaming form of filter_articles: consumes any iterable of articles and
+    yields the ones within the time range that contain no blocked keywords.
     """
     if start_date and end_date:
         start_time = start_date
@@ -84,19 +129,15 @@ def filter_articles(articles, days=None, start_date=None, end_date=None):
         end_time = datetime.now(timezone.utc)
         start_time = end_time - timedelta(days=days_to_filter)
 
-    filtered_articles = []
     blocked_count = 0
+    blocklist = get_blocklist_matcher()
 
     for article in articles:
         # 1. Blocklist Filtering (Check title and summary)
         title = article.get('title', '').lower()
         summary = article.get('summary', '').lower()
         
-        is_blocked = False
-        for kw in BLOCKED_KEYWORDS:
-            if kw.lower() in title or kw.lower() in summary:
-                is_blocked = True
-                break
+        is_blocked = blocklist.matches_any(title) or blocklist.matches_any(summary)
         
         if is_blocked:
             blocked_count += 1
@@ -104,32 +145,25 @@ def filter_articles(articles, days=None, start_date=None, end_date=None):
 
         # 2. Date Filtering
         published_time = article.get('published')
-        if not published_time:
-            filtered_articles.append(article)
-            continue
-        if published_time.tzinfo is None:
-            published_time = published_time.replace(tzinfo=timezone.utc)
-        
-        if start_time <= published_time <= end_time:
-            filtered_articles.append(article)
+        if published_time:
+            if published_time.tzinfo is None:
+                published_time = published_time.replace(tzinfo=timezone.utc)
+            if not (start_time <= published_time <= end_time):
+                continue
+
+        if not SHOW_IMAGES:
+            clean_summary(article)
+        yield article
     
     if blocked_count > 0:
         print(f"    [BLOCK] Filtered out {blocked_count} articles based on blocklist.")
-    
-    # Optional: Cleanup summaries for a cleaner report (and save translation tokens)
-    if not SHOW_IMAGES:
-        for article in filtered_articles:
-            summary = article.get('summary', '')
-            if summary:
-                # 1. Remove Markdown image syntax: ![alt](url)
-                summary = re.sub(r'!\[[^\]]*\]\([^\)]*\)', '', summary)
-                # 2. Remove ALL HTML tags (including <b>, <strong>, <img>, <a> etc.)
-                # This ensures the report is plain text and not bolded by source styles
-                summary = re.sub(r'<[^>]+>', '', summary)
-                # 3. Cleanup escaping/excess whitespace
-                article['summary'] = summary.strip()
-        
-    return filtered_articles
+
+def filter_articles(articles, days=None, start_date=None, end_date=None):
+    """
+    Filters articles within the specified time range and 
+    removes articles containing blocked keywords.
+    """
+    return list(iter_filtered_articles(articles, days=days, start_date=start_date, end_date=end_date))
 
 def truncate_summary(text, word_limit=100):
     """Truncates text to a specified word limit while attempting to keep sentences whole."""
@@ -147,27 +181,42 @@ def truncate_summary(text, word_limit=100):
     # (Optional polish: can be added if needed, but simple join is usually fine)
     return truncated + "..."
 
-def deduplicate_and_merge_articles(articles):
-    """Identifies and merges similar articles based on topics."""
-    print("\n[Stage 4/5] Merging similar articles...")
+def deduplicate_and_merge_articles(articles, strategy=None, threshold=None):
+    """
+    Identifies and merges similar articles based on topics.
+    strategy='topic_key' merges on the title-prefix key set during translation;
+    strategy='minhash' merges near-duplicate titles/summaries (MinHash + LSH).
+    """
+    strategy = strategy or DEDUP_STRATEGY
+    print(f"\n[Stage 4/5] Merging similar articles ({strategy})...")
+    if strategy == 'minhash':
+        # near_dup pulls in numpy when available; only load it for this strategy
+        from app.core.near_dup import near_duplicate_keys
+        articles = list(articles)
+        threshold = DEDUP_SIMILARITY_THRESHOLD if threshold is None else threshold
+        topic_keys = near_duplicate_keys(articles, threshold=threshold)
+    else:
+        topic_keys = None
+
     unique_articles = []
-    for article in tqdm(articles, desc="Merging"):
+    # topic_key -> kept article, and per kept article (by id) the links already listed
+    by_topic = {}
+    seen_links = {}
+    for index, article in enumerate(tqdm(articles, desc="Merging")):
         source_info = {'name': article['source_name'], 'link': article['link']}
-        current_topic = article.get('topic_key')
-        
-        is_duplicate = False
-        if current_topic:
-            for unique_article in unique_articles:
-                if current_topic == unique_article.get('topic_key'):
-                    if 'sources' not in unique_article:
-                        unique_article['sources'] = [{'name': unique_article['source_name'], 'link': unique_article['link']}]
-                    if not any(s['link'] == source_info['link'] for s in unique_article['sources']):
-                        unique_article['sources'].append(source_info)
-                    is_duplicate = True
-                    break
+        current_topic = topic_keys[index] if topic_keys is not None else article.get('topic_key')
         
-        if not is_duplicate:
+        unique_article = by_topic.get(current_topic) if current_topic is not None and current_topic != '' else None
+        if unique_article is not None:
+            links = seen_links[id(unique_article)]
+            if source_info['link'] not in links:
+                links.add(source_info['link'])
+                unique_article['sources'].append(source_info)
+        else:
             new_article = article.copy()
             new_article['sources'] = [source_info]
             unique_articles.append(new_article)
-    return unique_articles
\ No newline at end of file
+            seen_links[id(new_article)] = {source_info['link']}
+            if current_topic is not None and current_topic != '':
+                by_topic[current_topic] = new_article
+    return unique_articles
@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `burst` saved up.
+    penalize() cuts the rate after an error (down to `min_rate`) and reward()
+    lets it recover towards the configured rate after successes.
+    """
+
+    def __init__(self, rate, burst=1, min_rate=None):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate else self.max_rate / 8
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Blocks until a token is available. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def penalize(self, factor=0.5):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * factor)
+            # Drop the saved-up burst so the slower rate applies immediately
+            self.tokens = min(self.tokens, 0.0)
+
+    def reward(self, factor=1.1):
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate * factor)
+
+# Per-host politeness defaults: at most `burst` requests back to back, then
+# one every `min_interval` seconds plus up to `jitter` seconds of random delay
+DEFAULT_HOST_LIMIT = {'min_interval': 1.0, 'jitter': 0.5, 'burst': 1}
+# Status codes that mean "slow down"
+THROTTLE_STATUS = (403, 429)
+
+class HostRateLimiter:
+    """
+    One TokenBucket per host. wait() only sleeps when a request would exceed
+    the host's budget (jitter is added to those waits only). record() halves
+    a host's rate after 403/429 (down to 1/max_interval, honouring a numeric
+    Retry-After) and lets it recover after successful responses.
+    """
+
+    def __init__(self, limits=None, default=None):
+        self.limits = limits or {}
+        self.default = dict(DEFAULT_HOST_LIMIT, **(default or {}))
+        self._buckets = {}
+        self._blocked_until = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url_or_host):
+        if '//' in url_or_host:
+            return urlparse(url_or_host).netloc
+        return url_or_host
+
+    def config_for(self, host):
+        return dict(self.default, **self.limits.get(host, {}))
+
+    def _bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                config = self.config_for(host)
+                interval = max(float(config['min_interval']), 1e-3)
+                max_interval = float(config.get('max_interval', interval * 8))
+                bucket = TokenBucket(1.0 / interval, burst=config['burst'], min_rate=1.0 / max_interval)
+                self._buckets[host] = bucket
+            return bucket
+
+    def wait(self, url_or_host):
+        """Blocks until the host may be requested again. Returns the seconds waited."""
+        host = self.host_of(url_or_host)
+        waited = 0.0
+        blocked = self._blocked_until.get(host, 0) - time.monotonic()
+        if blocked > 0:
+            time.sleep(blocked)
+            waited += blocked
+        waited += self._bucket(host).acquire()
+        if waited > 0:
+            jitter = random.uniform(0, float(self.config_for(host)['jitter']))
+            time.sleep(jitter)
+            waited += jitter
+        return waited
+
+    def record(self, url_or_host, status_code, retry_after=None):
+        """Feeds a response status back into the host's rate."""
+        host = self.host_of(url_or_host)
+        bucket = self._bucket(host)
+        if status_code in THROTTLE_STATUS:
+            bucket.penalize()
+            try:
+                delay = float(retry_after) if retry_after is not None else 0.0
+            except (TypeError, ValueError):
+                delay = 0.0  # HTTP-date form: the slower rate is enough
+            if delay > 0:
+                self._blocked_until[host] = time.monotonic() + delay
+            print(f"[WARN] {host} answered {status_code}; slowing to one request per {1 / bucket.rate:.1f}s")
+        elif 200 <= status_code < 400:
+            bucket.reward()
+
+_host_limiter = None
+_host_limiter_lock = threading.Lock()
+
+def get_host_limiter():
+    """Process-wide limiter configured from HOST_RATE_LIMITS (shared by all collectors)."""
+    global _host_limiter
+    if _host_limiter is None:
+        # Collectors run in threads: two limiters would each allow a full burst
+        with _host_limiter_lock:
+            if _host_limiter is None:
+                import config.settings as settings
+                _host_limiter = HostRateLimiter(getattr(settings, 'HOST_RATE_LIMITS', {}))
+    return _host_limiter
@@ -1,7 +1,113 @@
 import datetime
+import html
 import os
 from app.core.processor import truncate_summary
 
+# Shared stylesheet for HTML reports and the HTML email body
+REPORT_CSS = """
+        body { font-family: 'Segoe UI', Roboto, Helvetica, Arial, sans-serif; color: #333; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }
+        h1 { color: #1a73e8; border-bottom: 2px solid #eee; padding-bottom: 10px; }
+        h2 { color: #202124; margin-top: 30px; border-left: 4px solid #1a73e8; padding-left: 10px; }
+        h3 { color: #444; margin-bottom: 15px; }
+        h4 { color: #000; margin-top: 15px; margin-bottom: 5px; font-size: 1.1em; }
+        p { margin-top: 0; margin-bottom: 10px; }
+        table { border-collapse: collapse; width: 100%; margin: 20px 0; box-shadow: 0 1px 3px rgba(0,0,0,0.1); }
+        th { background-color: #f8f9fa; color: #5f6368; font-weight: bold; border: 1px solid #dee2e6; padding: 12px; text-align: left; }
+        td { border: 1px solid #dee2e6; padding: 12px; }
+        tr:nth-child(even) { background-color: #fcfcfc; }
+        blockquote { margin: 20px 0; padding: 10px 20px; border-left: 5px solid #1a73e8; background: #f0f7ff; color: #555; }
+        code { background-color: #f4f4f4; padding: 2px 4px; border-radius: 4px; font-family: 'Courier New', monospace; }
+        .footer { margin-top: 40px; border-top: 1px solid #eee; padding-top: 20px; font-size: 12px; color: #888; text-align: center; }
+"""
+
+# Markdown layouts for the news section
+NEWS_STYLES = {
+    # Global_Digest report: categories nested under "## Global News Summary"
+    'digest': {
+        'category': "### 📰 {category} ({count} items)\n\n",
+        'title': "#### ● {title} (Source: {sources})\n",
+        'summary': "{summary}\n",
+        'end': "\n",
+    },
+    # Standalone News_Summary file
+    'summary': {
+        'category': "## 📰 {category} ({count} items)\n\n",
+        'title': "### {title} (Source: {sources})\n\n",
+        'summary': "{summary}\n\n",
+        'end': "---\n\n",
+    },
+}
+
+def order_categories(categorized_articles, preferred=()):
+    """Preferred categories first, then the rest in insertion order, Others always last."""
+    all_categories = list(categorized_articles.keys())
+    categories_order = [c for c in preferred if c in categorized_articles]
+    categories_order.extend(c for c in all_categories if c not in preferred and c != "Others")
+    if "Others" in all_categories:
+        categories_order.append("Others")
+    return categories_order
+
+def iter_news_blocks(categorized_articles, style='digest', preferred=()):
+    """Yields the news section as self-contained Markdown blocks (one per header / article)."""
+    layout = NEWS_STYLES[style]
+    for category in order_categories(categorized_articles, preferred):
+        articles = categorized_articles.get(category, [])
+        if not articles:
+            continue
+
+        yield layout['category'].format(category=category, count=len(articles))
+        for article in articles:
+            # Format sources as (Source: Link1, Link2)
+            source_line = ", ".join([f"[{s['name']}]({s['link']})" for s in article['sources']])
+            parts = [layout['title'].format(title=article['translated_title'], sources=source_line)]
+            if article['translated_summary']:
+                truncated_summary = truncate_summary(article['translated_summary'], word_limit=100)
+                parts.append(layout['summary'].format(summary=truncated_summary))
+            parts.append(layout['end'])
+            yield "".join(parts)
+
+class ReportWriter:
+    """
+    Streams Markdown blocks to a report file as they are produced, optionally
+    converting each block to HTML into a second file in the same pass.
+    Blocks must be self-contained (a table never spans two blocks).
+    """
+
+    def __init__(self, md_path, html_path=None, title=""):
+        self.md_path = md_path
+        self.html_path = html_path
+        self.md_file = open(md_path, 'w', encoding='utf-8')
+        self.html_file = None
+        if html_path:
+            import markdown
+            self._to_html = lambda block: markdown.markdown(block, extensions=['tables', 'fenced_code'])
+            self.html_file = open(html_path, 'w', encoding='utf-8')
+            self.html_file.write(f"<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{html.escape(title)}</title>\n"
+                                 f"<style>{REPORT_CSS}</style>\n</head>\n<body>\n")
+
+    def write(self, block):
+        self.md_file.write(block)
+        if self.html_file:
+            self.html_file.write(self._to_html(block))
+            self.html_file.write("\n")
+
+    def write_all(self, blocks):
+        for block in blocks:
+            self.write(block)
+
+    def close(self):
+        self.md_file.close()
+        if self.html_file:
+            self.html_file.write("</body>\n</html>\n")
+            self.html_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
 def write_markdown_file(categorized_articles, output_filename=""):
     """
     Renders categorized articles into a Markdown file.
@@ -21,37 +127,11 @@ def write_markdown_file(categorized_articles, output_filename=""):
     full_path = os.path.join(output_dir, output_filename)
 
     try:
-        with open(full_path, 'w', encoding='utf-8') as f:
+        with ReportWriter(full_path) as out:
             # Header
-            f.write(f"# News Summary ({datetime.datetime.now().strftime('%Y-%m-%d')})\n\n")
-            
+            out.write(f"# News Summary ({datetime.datetime.now().strftime('%Y-%m-%d')})\n\n")
             # Category sorting (Others always last)
-            all_categories = list(categorized_articles.keys())
-            categories_order = [c for c in all_categories if c != "Others"]
-            if "Others" in all_categories:
-                categories_order.append("Others")
-            
-            for category in categories_order:
-                articles = categorized_articles.get(category, [])
-                if not articles:
-                    continue
-                
-                # Category Header
-                f.write(f"## 📰 {category} ({len(articles)} items)\n\n")
-                
-                for article in articles:
-                    # Format sources as (Source: Link1, Link2)
-                    source_line = ", ".join([f"[{s['name']}]({s['link']})" for s in article['sources']])
-                    
-                    # Article Title with Source Links
-                    f.write(f"### {article['translated_title']} (Source: {source_line})\n\n")
-                    
-                    # Translated Summary
-                    if article['translated_summary']:
-                        truncated_summary = truncate_summary(article['translated_summary'], word_limit=100)
-                        f.write(f"{truncated_summary}\n\n")
-                    
-                    f.write("---\n\n")
+            out.write_all(iter_news_blocks(categorized_articles, style='summary'))
         
         print(f"[Stage 5/5] Success! Report saved to: {full_path}")
         return full_path
@@ -0,0 +1,75 @@
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TIMELINE_WIDTH = 40
+
+def group_by_host(tasks):
+    """{host: [(name, module_name), ...]} keeping the task order within each host."""
+    groups = {}
+    for name, module_name, host in tasks:
+        groups.setdefault(host, []).append((name, module_name))
+    return groups
+
+def run_collector(name, module_name, host, origin):
+    """Imports and runs one collector's main(); returns its timeline entry."""
+    print(f"  -> [{host}] Processing {name}...")
+    started = time.perf_counter()
+    error = None
+    try:
+        importlib.import_module(module_name).main()
+    except Exception as e:
+        error = str(e)
+        print(f"  !!! Error in {name}: {e}")
+    finished = time.perf_counter()
+    return {
+        'name': name,
+        'host': host,
+        'start': started - origin,
+        'end': finished - origin,
+        'error': error,
+    }
+
+def run_collectors(tasks, concurrent=True, max_workers=None):
+    """
+    Runs (name, module_name, host) collector tasks.
+    Collectors for the same host run one after another in a single thread (so
+    their politeness delays still apply); different hosts run in parallel.
+    Returns the timeline entries in task order.
+    """
+    origin = time.perf_counter()
+    if concurrent:
+        groups = group_by_host(tasks)
+        workers = min(max_workers or len(groups), len(groups)) or 1
+
+        def run_chain(host, chain):
+            return [run_collector(name, module_name, host, origin) for name, module_name in chain]
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='arb') as pool:
+            futures = [pool.submit(run_chain, host, chain) for host, chain in groups.items()]
+            entries = {entry['name']: entry for future in futures for entry in future.result()}
+        timeline = [entries[name] for name, _, _ in tasks]
+    else:
+        timeline = [run_collector(name, module_name, host, origin) for name, module_name, host in tasks]
+
+    print_timeline(timeline, time.perf_counter() - origin)
+    return timeline
+
+def print_timeline(timeline, wall_seconds):
+    """Per-collector start/end offsets with a bar chart, then wall vs serial time."""
+    if not timeline:
+        return
+    span = max(wall_seconds, 1e-6)
+    name_width = max(len(entry['name']) for entry in timeline)
+    host_width = max(len(entry['host']) for entry in timeline)
+    print("\n[TIMELINE] Arb collectors (seconds from stage start)")
+    for entry in timeline:
+        first = int(entry['start'] / span * TIMELINE_WIDTH)
+        last = max(first + 1, int(round(entry['end'] / span * TIMELINE_WIDTH)))
+        bar = " " * first + "#" * (last - first)
+        status = "ERR" if entry['error'] else "ok"
+        print(f"  {entry['name']:<{name_width}}  {entry['host']:<{host_width}}  "
+              f"{entry['start']:6.1f} -> {entry['end']:6.1f}  |{bar:<{TIMELINE_WIDTH}}|  {status}")
+    serial_seconds = sum(entry['end'] - entry['start'] for entry in timeline)
+    print(f"[STATS] Arb stage: {wall_seconds:.1f}s wall vs {serial_seconds:.1f}s of collector time "
+          f"({len({entry['host'] for entry in timeline})} host groups)")
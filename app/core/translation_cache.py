@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from app.core.news_db import get_news_db, news_db_lock
+import config.settings as settings
+
+TRANSLATION_CACHE_TTL_DAYS = getattr(settings, 'TRANSLATION_CACHE_TTL_DAYS', 90)
+TRANSLATION_CACHE_MAX_ENTRIES = getattr(settings, 'TRANSLATION_CACHE_MAX_ENTRIES', 100000)
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class TranslationCache:
+    """
+    Translation memory stored in news_data.db, keyed by
+    (sha256 of the source text, source language, target language).
+    Entries expire after `ttl_days`; beyond `max_entries` the least recently
+    used ones are evicted when the cache is closed.
+    """
+
+    def __init__(self, source, target, ttl_days=None, max_entries=None):
+        self.source = source
+        self.target = target
+        self.ttl_days = TRANSLATION_CACHE_TTL_DAYS if ttl_days is None else ttl_days
+        self.max_entries = TRANSLATION_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+        self._used = set()
+        self.conn = get_news_db()
+
+    def _cutoff(self):
+        return (datetime.now(timezone.utc) - timedelta(days=self.ttl_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    def get(self, text):
+        key = text_hash(text)
+        with news_db_lock():
+            row = self.conn.execute('''
+                SELECT translation FROM translation_cache
+                WHERE text_hash = ? AND source_lang = ? AND target_lang = ? AND created_at >= ?
+            ''', (key, self.source, self.target, self._cutoff())).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used.add(key)
+        return row[0]
+
+    def put(self, text, translation):
+        if not translation:
+            return
+        with news_db_lock(), self.conn:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO translation_cache
+                (text_hash, source_lang, target_lang, translation, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ''', (text_hash(text), self.source, self.target, translation))
+
+    def close(self):
+        """Records LRU timestamps and evicts expired/excess entries (the shared connection stays open)."""
+        with news_db_lock(), self.conn:
+            cursor = self.conn.cursor()
+            cursor.executemany('''
+                UPDATE translation_cache SET last_used_at = CURRENT_TIMESTAMP
+                WHERE text_hash = ? AND source_lang = ? AND target_lang = ?
+            ''', [(key, self.source, self.target) for key in self._used])
+            cursor.execute("DELETE FROM translation_cache WHERE created_at < ?", (self._cutoff(),))
+            cursor.execute('''
+                DELETE FROM translation_cache WHERE rowid IN (
+                    SELECT rowid FROM translation_cache
+                    ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return f"{self.hits} hits / {self.misses} misses ({rate:.1f}% hit rate)"
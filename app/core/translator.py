@@ -1,39 +1,259 @@
-from deep_translator import GoogleTranslator
 from tqdm import tqdm
+import threading
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from config.settings import TARGET_LANGUAGE
+from app.core.translation_cache import TranslationCache
+from app.core.rate_limit import TokenBucket
+import config.settings as settings
 
-def translate_articles(articles):
+TRANSLATION_CACHE = getattr(settings, 'TRANSLATION_CACHE', True)
+# 'serial' = one request per string, 'batch' = pack many strings per request,
+# 'parallel' = one request per string from a worker pool
+TRANSLATION_MODE = getattr(settings, 'TRANSLATION_MODE', 'batch')
+TRANSLATION_BATCH_CHARS = getattr(settings, 'TRANSLATION_BATCH_CHARS', 4500)
+# Backend budget shared by all modes (replaces the fixed per-article sleeps)
+TRANSLATION_RATE = getattr(settings, 'TRANSLATION_RATE', 3.0)
+TRANSLATION_BURST = getattr(settings, 'TRANSLATION_BURST', 3)
+TRANSLATION_WORKERS = getattr(settings, 'TRANSLATION_WORKERS', 4)
+TRANSLATION_MAX_RETRIES = getattr(settings, 'TRANSLATION_MAX_RETRIES', 2)
+
+# Segments are joined with a marker the backend leaves untouched, then split back
+BATCH_SEPARATOR = "\n@@@\n"
+BATCH_SPLIT_RE = re.compile(r'\s*@\s*@\s*@\s*')
+
+def new_translator():
+    """Backend client; deep_translator is only imported once something needs translating."""
+    from deep_translator import GoogleTranslator
+    return GoogleTranslator(source='auto', target=TARGET_LANGUAGE)
+
+def make_topic_key(translated_title):
+    """Simple keyword-based topic key for merging."""
+    clean_title = re.sub(r'[^\w\s]', '', translated_title or '')
+    return clean_title[:10].strip().lower()
+
+def needs_translation(article):
+    """
+    Check Title: Translate if it has non-ASCII (Chinese/French accents) OR
+    if we are targeting English and it looks like it might be French.
+    For simplicity, if Target is English and text is purely ASCII, we can often skip.
+    """
+    title = article.get('title', '')
+    if not title:
+        return False
+    # If contains non-ASCII (Chinese, Accented characters like in French)
+    if any(ord(c) > 127 for c in title):
+        return True
+    # If target is English but source source_name is lefigaro (French), we should translate
+    return TARGET_LANGUAGE == 'en' and article.get('source_name') == 'lefigaro'
+
+def pack_batches(texts, char_limit):
+    """Greedily packs texts into batches whose joined length stays within char_limit."""
+    batches, current, current_len = [], [], 0
+    for text in texts:
+        added = len(text) + (len(BATCH_SEPARATOR) if current else 0)
+        if current and current_len + added > char_limit:
+            batches.append(current)
+            current, current_len = [], 0
+            added = len(text)
+        current.append(text)
+        current_len += added
+    if current:
+        batches.append(current)
+    return batches
+
+def translate_batched(translator, texts, char_limit=None, limiter=None):
+    """
+    Translates many strings with as few backend requests as the size limit allows.
+    Returns ({text: translation}, request count); batches whose result cannot be
+    split back cleanly are left out so the caller falls back to per-string requests.
+    """
+    char_limit = char_limit or TRANSLATION_BATCH_CHARS
+    results = {}
+    requests_made = 0
+    # Oversized strings cannot share a request; leave them to the serial path
+    packable = [t for t in texts if len(t) <= char_limit]
+    batches = pack_batches(packable, char_limit)
+    for batch in batches:
+        # Newlines inside a segment would be indistinguishable from layout changes
+        payload = BATCH_SEPARATOR.join(' '.join(t.split()) for t in batch)
+        if limiter:
+            limiter.acquire()
+        requests_made += 1
+        try:
+            translated = translator.translate(payload) or ''
+        except Exception as e:
+            print(f"\n[WARN] Batch translation failed ({len(batch)} strings): {e}")
+            if limiter:
+                limiter.penalize()
+            continue
+        if limiter:
+            limiter.reward()
+        parts = BATCH_SPLIT_RE.split(translated.strip())
+        if len(parts) != len(batch):
+            print(f"\n[WARN] Batch split mismatch ({len(parts)} != {len(batch)}), falling back to single requests.")
+            continue
+        for text, part in zip(batch, parts):
+            results[text] = part.strip()
+    return results, requests_made
+
+def translate_parallel(texts, limiter, workers=None, max_retries=None):
+    """
+    Translates strings one request each from a bounded worker pool; the shared
+    token bucket sets the request rate and slows down after errors.
+    Returns ({text: translation}, set of texts that kept failing).
+    """
+    workers = workers or TRANSLATION_WORKERS
+    max_retries = TRANSLATION_MAX_RETRIES if max_retries is None else max_retries
+    local = threading.local()
+
+    def worker(text):
+        # GoogleTranslator keeps per-request state on the instance: one per thread
+        if not hasattr(local, 'translator'):
+            local.translator = new_translator()
+        for attempt in range(max_retries + 1):
+            limiter.acquire()
+            try:
+                result = local.translator.translate(text)
+                limiter.reward()
+                return result
+            except Exception as e:
+                limiter.penalize()
+                if attempt == max_retries:
+                    print(f"\n[ERR] Translation error: {e}")
+                    return None
+                time.sleep(2 ** attempt)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for text, result in zip(texts, pool.map(worker, texts)):
+            if result is not None:
+                results[text] = result
+    return results, set(texts) - set(results)
+
+def translate_articles(articles, known=None, mode=None, cache=None, limiter=None, quiet=False, stats=None):
     """
     Translates article titles and summaries into target language (default: English).
+    `known` maps links to translations already stored in news_data.db;
+    those articles reuse the stored text instead of calling the translator.
+    `mode` is 'serial', 'batch' or 'parallel' (default: TRANSLATION_MODE).
+    A caller translating in chunks passes its own `cache` / `limiter` (kept
+    open across calls), `quiet=True` to suppress per-chunk output and a
+    `stats` dict whose 'requests' count is increased by this call's backend requests.
     """
-    print(f"\n[Stage 3/5] Starting translation to {TARGET_LANGUAGE}...")
+    mode = mode or TRANSLATION_MODE
+    if not quiet:
+        print(f"\n[Stage 3/5] Starting translation to {TARGET_LANGUAGE}...")
     processed_articles = []
+    known = known or {}
+    reused_count = 0
     
     # Initialize translator
-    translator = GoogleTranslator(source='auto', target=TARGET_LANGUAGE)
+    translator = new_translator()
+    owns_cache = cache is None
+    if owns_cache and TRANSLATION_CACHE:
+        cache = TranslationCache('auto', TARGET_LANGUAGE)
+    limiter = limiter or TokenBucket(TRANSLATION_RATE, burst=TRANSLATION_BURST)
+    network_calls = 0
+    # Translations resolved ahead of the per-article loop (cache hits, batches, workers)
+    resolved = {}
+    failed = set()
+    # Strings the pre-pass already missed in the cache (not looked up again)
+    uncached = set()
+
+    def translate_text(text):
+        nonlocal network_calls
+        if text in resolved:
+            return resolved[text]
+        if text in failed:
+            raise RuntimeError("translation failed after retries")
+        if cache and text not in uncached:
+            cached = cache.get(text)
+            if cached is not None:
+                return cached
+        limiter.acquire()
+        network_calls += 1
+        try:
+            result = translator.translate(text)
+        except Exception:
+            limiter.penalize()
+            raise
+        limiter.reward()
+        if cache:
+            cache.put(text, result)
+        return result
+
+    def reuse_stored(article, should_translate):
+        # A stored copy whose title was never translated (earlier failure) is retried
+        stored = known.get(article.get('link'))
+        if stored and not (should_translate and stored['translated_title'] == article.get('title')):
+            return stored
+        return None
 
-    for article in tqdm(articles, desc="Translating"):
+    if mode in ('batch', 'parallel'):
+        # Group pending strings by source (≈ language) so each batch is monolingual
+        groups = {}
+        seen = set()
+        for article in articles:
+            should_translate = needs_translation(article)
+            if not should_translate or reuse_stored(article, should_translate):
+                continue
+            for text in (article.get('title', ''), article.get('summary', '')[:2000]):
+                if not text or text in seen:
+                    continue
+                seen.add(text)
+                cached = cache.get(text) if cache else None
+                if cached is not None:
+                    resolved[text] = cached
+                else:
+                    uncached.add(text)
+                    groups.setdefault(article.get('source_name'), []).append(text)
+
+        pending = sum(len(texts) for texts in groups.values())
+        if pending and mode == 'parallel':
+            texts = [t for group in groups.values() for t in group]
+            started = time.perf_counter()
+            parallel_results, failed = translate_parallel(texts, limiter)
+            network_calls += len(texts)
+            resolved.update(parallel_results)
+            if cache:
+                for text, translation in parallel_results.items():
+                    cache.put(text, translation)
+            if not quiet:
+                print(f"    [PARALLEL] {len(parallel_results)}/{pending} strings translated in "
+                      f"{time.perf_counter() - started:.1f}s (final rate {limiter.rate:.1f} req/s).")
+        elif pending:
+            batch_requests = 0
+            for texts in groups.values():
+                batch_results, requests_made = translate_batched(translator, texts, limiter=limiter)
+                batch_requests += requests_made
+                resolved.update(batch_results)
+                if cache:
+                    for text, translation in batch_results.items():
+                        cache.put(text, translation)
+            network_calls += batch_requests
+            if not quiet:
+                print(f"    [BATCH] {pending} strings sent in {batch_requests} requests.")
+
+    for article in tqdm(articles, desc="Translating", disable=quiet):
         new_article = article.copy()
+
+        should_translate = needs_translation(article)
+
+        stored = reuse_stored(article, should_translate)
+        if stored:
+            new_article['translated_title'] = stored['translated_title']
+            new_article['translated_summary'] = stored['translated_summary']
+            new_article['topic_key'] = make_topic_key(new_article['translated_title'])
+            processed_articles.append(new_article)
+            reused_count += 1
+            continue
         
         try:
-            # Check Title: Translate if it has non-ASCII (Chinese/French accents) OR 
-            # if we are targeting English and it looks like it might be French.
-            # For simplicity, if Target is English and text is purely ASCII, we can often skip.
             title = article.get('title', '')
-            should_translate = False
-            
-            if title:
-                # If contains non-ASCII (Chinese, Accented characters like in French)
-                if any(ord(c) > 127 for c in title):
-                    should_translate = True
-                # If target is English but source source_name is lefigaro (French), we should translate
-                elif TARGET_LANGUAGE == 'en' and article.get('source_name') == 'lefigaro':
-                    should_translate = True
-                
             if should_translate:
-                new_article['translated_title'] = translator.translate(title)
+                new_article['translated_title'] = translate_text(title)
             else:
                 new_article['translated_title'] = title
             
@@ -42,18 +262,15 @@ def translate_articles(articles):
             if summary:
                 # Same check for summary but we skip if already translated title was skipped
                 if should_translate:
-                    new_article['translated_summary'] = translator.translate(summary)
+                    new_article['translated_summary'] = translate_text(summary)
                 else:
                     new_article['translated_summary'] = summary
             else:
                 new_article['translated_summary'] = ""
             
-            # Simple keyword-based topic key for merging
-            clean_title = re.sub(r'[^\w\s]', '', new_article['translated_title'])
-            new_article['topic_key'] = clean_title[:10].strip().lower()
+            new_article['topic_key'] = make_topic_key(new_article['translated_title'])
             
             processed_articles.append(new_article)
-            time.sleep(0.3) # Slightly reduced delay
 
         except Exception as e:
             print(f"\n[ERR] Translation error: {e}")
@@ -61,6 +278,52 @@ def translate_articles(articles):
             new_article['translated_summary'] = article.get('summary', '')
             new_article['topic_key'] = None
             processed_articles.append(new_article)
-            time.sleep(1)
 
+    if stats is not None:
+        stats['requests'] = stats.get('requests', 0) + network_calls
+    if not quiet:
+        print(f"    [STATS] {network_calls} translator requests ({mode} mode, final rate {limiter.rate:.1f} req/s).")
+    if cache and owns_cache:
+        print(f"    [CACHE] Translation memory: {cache.summary()}")
+        cache.close()
+    if reused_count and not quiet:
+        print(f"    [CACHE] Reused stored translations for {reused_count}/{len(articles)} articles.")
     return processed_articles
+
+def iter_translated_articles(articles, lookup_known=None, chunk_size=50, mode=None):
+    """
+    Streaming form of translate_articles: pulls articles from any iterable,
+    translates them in chunks of `chunk_size` and yields them in input order.
+    `lookup_known(links)` returns stored translations to reuse (see news_db).
+    The translation memory and rate limiter are shared across chunks.
+    """
+    print(f"\n[Stage 3/5] Streaming translation to {TARGET_LANGUAGE} (chunks of {chunk_size})...")
+    cache = TranslationCache('auto', TARGET_LANGUAGE) if TRANSLATION_CACHE else None
+    limiter = TokenBucket(TRANSLATION_RATE, burst=TRANSLATION_BURST)
+    total = 0
+    reused = 0
+    stats = {'requests': 0}
+
+    def flush(chunk):
+        nonlocal reused
+        known = lookup_known(a.get('link') for a in chunk) if lookup_known else {}
+        reused += sum(1 for a in chunk if a.get('link') in known)
+        return translate_articles(chunk, known=known, mode=mode, cache=cache, limiter=limiter, quiet=True, stats=stats)
+
+    try:
+        chunk = []
+        for article in articles:
+            chunk.append(article)
+            if len(chunk) >= chunk_size:
+                total += len(chunk)
+                yield from flush(chunk)
+                chunk = []
+        if chunk:
+            total += len(chunk)
+            yield from flush(chunk)
+    finally:
+        if cache:
+            print(f"    [CACHE] Translation memory: {cache.summary()}")
+            cache.close()
+    print(f"[Stage 3/5] Translated {total} articles ({reused} reused from news_data.db, "
+          f"{stats['requests']} translator requests).")
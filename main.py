@@ -1,53 +1,141 @@
 
 # main.py
 import time
+_IMPORT_STARTED = time.perf_counter()
 import sys
 import argparse
-from datetime import datetime, timezone
+import importlib
+from datetime import datetime, timedelta, timezone
 from tqdm import tqdm
 
 # Import utilities
 from config.settings import RSS_FEEDS
-from app.core.fetcher import fetch_all_feeds
-from app.core.translator import translate_articles
+import config.settings as settings
+from app.core.fetcher import fetch_all_feeds, iter_feed_articles, FEED_CONDITIONAL_GET
+from app.core.translator import translate_articles, iter_translated_articles, make_topic_key
 from app.core.processor import (
     deduplicate_and_merge_articles, 
     filter_articles, 
+    iter_filtered_articles,
     apply_keyword_categorization,
     load_categories
 )
-from app.core.db import init_db
-from app.core.news_db import save_news_articles
+from app.core.db import init_db, set_snapshot_mode
+from app.core.news_db import (
+    save_news_articles,
+    save_feed_validators,
+    fetch_stored_translations,
+    search_news,
+    load_archived_articles
+)
 from app.core.unified_reporter import generate_unified_report
-from app.core.mailer import send_report_email
-
-# Import Arb Collectors
-from app.collectors.lof_funds import main as run_jisilu_lof
-from app.collectors.a_share_arbitrage import main as run_a_share_arbitrage
-from app.collectors.bond_issuance import main as run_bond_issuance
-from app.collectors.forex import main as run_forex_rates
-from app.collectors.commodities import main as run_commodities
-from app.collectors.spac_arbitrage import main as run_spac_arbitrage
-from app.collectors.cef_arbitrage import main as run_cef_arbitrage
-from app.collectors.qdii_arbitrage import main as run_qdii_arbitrage
-from app.collectors.cbond_monitor import main as run_cbond_monitor
-from app.collectors.market_indices import main as run_market_indices
-
-def run_news_pipeline(days=1, start_date=None, end_date=None):
-    """Fetches and processes news, returns categorized articles."""
+from app.core.scheduler import run_collectors
+from app.core.http_client import print_http_stats
+from app.core import http_cache
+
+# Arb Collectors (imported on demand: yfinance/pandas, curl_cffi, bs4 and the
+# Jisilu login stack are only loaded when the arb task actually runs).
+# The last field is the host group: collectors sharing a host run in sequence.
+ARB_TASKS = [
+    ("LOF/IOF", "app.collectors.lof_funds", "jisilu"),
+    ("Bond Issuance", "app.collectors.bond_issuance", "eastmoney"),
+    ("A-share Arbitrage", "app.collectors.a_share_arbitrage", "jisilu"),
+    ("Forex Rates", "app.collectors.forex", "boc"),
+    ("Commodities", "app.collectors.commodities", "yahoo"),
+    ("SPAC Arbitrage", "app.collectors.spac_arbitrage", "stockanalysis"),
+    ("CEF Arbitrage", "app.collectors.cef_arbitrage", "cefconnect"),
+    ("QDII Arbitrage", "app.collectors.qdii_arbitrage", "jisilu"),
+    ("Cbond Monitor", "app.collectors.cbond_monitor", "eastmoney"),
+    ("Market Indices", "app.collectors.market_indices", "yahoo")
+]
+
+# Modules that should stay out of a run that does not need them
+HEAVY_MODULES = ['yfinance', 'pandas', 'numpy', 'curl_cffi', 'bs4', 'Crypto', 'ddddocr', 'deep_translator', 'markdown']
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+def load_archive_window(days=1, start_date=None, end_date=None):
+    """Stored (already translated) articles for the window, passed through the current blocklist."""
+    if not (start_date and end_date):
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=days if days is not None else 1)
+    archived = load_archived_articles(start_date, end_date)
+    for article in archived:
+        article['topic_key'] = make_topic_key(article['translated_title'])
+    print(f"\n[Archive] {len(archived)} stored articles in window from news_data.db")
+    return filter_articles(archived, start_date=start_date, end_date=end_date)
+
+def iter_with_archive(live_articles, archived_articles):
+    """Yields the live articles, then archived ones whose link was not fetched live."""
+    seen_links = set()
+    for article in live_articles:
+        seen_links.add(article.get('link'))
+        yield article
+    for article in archived_articles:
+        if article.get('link') not in seen_links:
+            yield article
+
+def articles_to_store(articles, merged):
+    """
+    Every article that went into the merge stage, each with its own source and
+    the category of the story it was merged into. Storing the merged-away ones
+    too lets --incremental rebuild the same stories (and "Source: A, B") from
+    news_data.db when their feeds answer 304.
+    """
+    category_by_link = {}
+    for story in merged:
+        for source in story['sources']:
+            category_by_link.setdefault(source['link'], story.get('category', 'Others'))
+    return [dict(article,
+                 category=category_by_link.get(article.get('link'), 'Others'),
+                 sources=[{'name': article['source_name'], 'link': article['link']}])
+            for article in articles]
+
+def run_news_pipeline(days=1, start_date=None, end_date=None, conditional=None, stream=False, incremental=False):
+    """
+    Fetches and processes news, returns categorized articles.
+    stream=True chains the stages as generators so filtering and translation
+    of early feeds overlap with fetching of later ones; the result is the same.
+    incremental=True answers the window from news_data.db: only what the feeds
+    currently carry is fetched (and only unseen articles translated), older
+    articles come from the archive.
+    Conditional GET is only used with incremental=True, where feeds that
+    answer 304 are covered by the archive; conditional=False forces full downloads.
+    """
     print("\n>>> Running News Aggregation Task...")
-    raw_articles = fetch_all_feeds(RSS_FEEDS)
-    if not raw_articles:
-        return {}
-    filtered = filter_articles(raw_articles, days=days, start_date=start_date, end_date=end_date)
-    if not filtered:
-        return {}
-    translated = translate_articles(filtered)
-    unique = deduplicate_and_merge_articles(translated)
-    categorized_data = apply_keyword_categorization(unique)
+    conditional = incremental and conditional is not False
+    window_start = start_date or datetime.now(timezone.utc) - timedelta(days=days if days is not None else 1)
+    # Filled by the fetch stage; stored only after the articles are (see below)
+    validators = {}
+    # Everything that reaches the merge stage (see articles_to_store)
+    merge_input = []
+    archived = load_archive_window(days, start_date, end_date) if incremental else []
+    if stream:
+        raw_articles = iter_feed_articles(RSS_FEEDS, conditional=conditional, window_start=window_start, validators_out=validators)
+        filtered = iter_filtered_articles(raw_articles, days=days, start_date=start_date, end_date=end_date)
+        translated = iter_translated_articles(filtered, lookup_known=fetch_stored_translations)
+        collected = (merge_input.append(article) or article for article in iter_with_archive(translated, archived))
+        unique = deduplicate_and_merge_articles(collected)
+    else:
+        raw_articles = fetch_all_feeds(RSS_FEEDS, conditional=conditional, window_start=window_start, validators_out=validators)
+        filtered = filter_articles(raw_articles, days=days, start_date=start_date, end_date=end_date) if raw_articles else []
+        translated = []
+        if filtered:
+            # Skip articles already stored in news_data.db: reuse their translations
+            known = fetch_stored_translations(a.get('link') for a in filtered)
+            translated = translate_articles(filtered, known=known)
+        merge_input = list(iter_with_archive(translated, archived))
+        unique = deduplicate_and_merge_articles(merge_input) if merge_input else []
+    categorized_data = apply_keyword_categorization(unique) if unique else []
     
     # Save to News Database
-    save_news_articles(categorized_data)
+    saved = save_news_articles(articles_to_store(merge_input, categorized_data))
+    # A 304 next time must mean "already stored": only now record the validators.
+    # A window that ends in the past did not store the newest entries.
+    if FEED_CONDITIONAL_GET and saved is not None and not end_date:
+        save_feed_validators(validators, window_start)
+    if not categorized_data:
+        return {}
     
     # Organize into categories
     keyword_map = load_categories()
@@ -62,30 +150,80 @@ def run_news_pipeline(days=1, start_date=None, end_date=None):
             categorized['Others'].append(article)
     return categorized
 
-def run_arb_pipeline():
-    """Runs all market arbitrage collectors."""
+def run_arb_pipeline(concurrent=None):
+    """Runs all market arbitrage collectors (host groups in parallel unless ARB_CONCURRENT is off)."""
     print("\n>>> Running Market Arbitrage Tasks...")
     init_db()
     
-    tasks = [
-        ("LOF/IOF", run_jisilu_lof),
-        ("Bond Issuance", run_bond_issuance),
-        ("A-share Arbitrage", run_a_share_arbitrage),
-        ("Forex Rates", run_forex_rates),
-        ("Commodities", run_commodities),
-        ("SPAC Arbitrage", run_spac_arbitrage),
-        ("CEF Arbitrage", run_cef_arbitrage),
-        ("QDII Arbitrage", run_qdii_arbitrage),
-        ("Cbond Monitor", run_cbond_monitor),
-        ("Market Indices", run_market_indices)
-    ]
-    
-    for name, task in tasks:
-        print(f"  -> Processing {name}...")
-        try:
-            task()
-        except Exception as e:
-            print(f"  !!! Error in {name}: {e}")
+    concurrent = getattr(settings, 'ARB_CONCURRENT', True) if concurrent is None else concurrent
+    run_collectors(ARB_TASKS, concurrent=concurrent, max_workers=getattr(settings, 'ARB_MAX_WORKERS', 6))
+    print_http_stats()
+
+def report_startup_time(load_news=False, load_arb=False):
+    """
+    Prints the import cost of the entry point, plus the modules each selected
+    task would load, without running anything. For a per-module breakdown use
+    `python -X importtime main.py --startup-time`.
+    """
+    print(f"[STARTUP] main.py imports: {IMPORT_SECONDS * 1000:.1f} ms ({len(sys.modules)} modules loaded)")
+    stages = []
+    if load_news:
+        stages.append(("news translator", ["deep_translator"]))
+    if load_arb:
+        stages.append(("arb collectors", [module_name for _, module_name, _ in ARB_TASKS]))
+    for label, module_names in stages:
+        started = time.perf_counter()
+        for module_name in module_names:
+            try:
+                importlib.import_module(module_name)
+            except Exception as e:
+                print(f"[WARN] Could not import {module_name}: {e}")
+        print(f"[STARTUP] + {label}: {(time.perf_counter() - started) * 1000:.1f} ms")
+    loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+    print(f"[STARTUP] Heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+
+def run_news_search(query, since=None, limit=20):
+    """Prints ranked full-text matches from the local news archive."""
+    started = time.perf_counter()
+    hits = search_news(query, since=since, limit=limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f">>> {len(hits)} results for \"{query}\"" + (f" since {since}" if since else "") + f" ({elapsed_ms:.1f} ms)\n")
+    for i, hit in enumerate(hits, 1):
+        title = hit['translated_title'] or hit['title']
+        print(f"{i:>3}. [{(hit['date'] or '')[:10]}] {title} ({hit['source_name']}, {hit['category']})")
+        print(f"     {hit['link']}")
+        if hit['snippet']:
+            print(f"     {hit['snippet']}")
+
+def run_history(instrument_id, since=None):
+    """Prints the stored daily series for one fund / bond / ticker."""
+    from app.core.arb_reporter import fetch_history
+    started = time.perf_counter()
+    series = fetch_history(instrument_id, since=since)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f">>> History for {instrument_id}" + (f" since {since}" if since else "") + f" ({elapsed_ms:.1f} ms)")
+    if not series:
+        print("No stored data for this instrument.")
+    for table_name, columns, rows in series:
+        print(f"\n[{table_name}] {len(rows)} days")
+        print("  " + "  ".join(f"{c:>14}" if i > 1 else f"{c:<12}" for i, c in enumerate(columns)))
+        for row in rows:
+            cells = []
+            for i, value in enumerate(row):
+                if i <= 1:
+                    cells.append(f"{str(value or '-')[:12]:<12}")
+                elif isinstance(value, float):
+                    cells.append(f"{value:>14.3f}")
+                else:
+                    cells.append(f"{str(value if value is not None else '-'):>14}")
+            print("  " + "  ".join(cells))
+
+def run_compaction():
+    """Moves closed months of the arb tables into data/archive (Parquet)."""
+    from app.core.archive import compact_closed_months
+    started = time.perf_counter()
+    compact_closed_months()
+    print(f">>> Compaction finished in {time.perf_counter() - started:.1f}s")
 
 def main():
     parser = argparse.ArgumentParser(description="Market & News Intelligence System")
@@ -94,8 +232,37 @@ def main():
     parser.add_argument('--arb', action='store_true', help="Run only market arb task")
     parser.add_argument('--days', type=int, default=1, help="News: Fetch from last N days")
     parser.add_argument('--mail', action='store_true', help="Send final report via email")
+    parser.add_argument('--full-fetch', action='store_true', help="News: with --incremental, ignore ETag/Last-Modified and re-download every feed")
+    parser.add_argument('--stream', action='store_true', help="News: stream articles through the stages instead of batching each stage")
+    parser.add_argument('--incremental', action='store_true', help="News: serve the --days window from news_data.db and only fetch the live feeds")
+    parser.add_argument('--search', metavar='QUERY', help="Search stored news (full-text) and exit")
+    parser.add_argument('--since', metavar='DATE', help="With --search / --history: only results on or after DATE (YYYY-MM-DD)")
+    parser.add_argument('--limit', type=int, default=20, help="With --search: maximum number of results")
+    parser.add_argument('--history', metavar='ID', help="Print the stored daily series for a fund / bond / ticker (e.g. 161226) and exit")
+    parser.add_argument('--compact', action='store_true', help="Archive closed months of the arb tables to data/archive (Parquet, needs pyarrow), prune them from finance_data.db and exit")
+    parser.add_argument('--html', action='store_true', help="Also write an HTML copy of the report next to the Markdown file")
+    parser.add_argument('--snapshot', action='store_true', help="Arb: record an intraday snapshot (only changed instruments are stored) instead of replacing today's rows")
+    parser.add_argument('--max-age', type=int, metavar='SECONDS', help="Arb: reuse cached responses up to SECONDS old (overrides HTTP_CACHE_TTLS)")
+    parser.add_argument('--no-cache', action='store_true', help="Arb: ignore the HTTP response cache and fetch everything")
+    parser.add_argument('--startup-time', action='store_true', help="Print import/startup cost (add --news/--arb to include their modules) and exit")
     
     args = parser.parse_args()
+
+    if args.startup_time:
+        report_startup_time(load_news=args.news, load_arb=args.arb)
+        return
+
+    if args.search:
+        run_news_search(args.search, since=args.since, limit=args.limit)
+        return
+
+    if args.history:
+        run_history(args.history, since=args.since)
+        return
+
+    if args.compact:
+        run_compaction()
+        return
     
     if not (args.news or args.arb):
         args.all = True
@@ -107,19 +274,28 @@ def main():
     
     categorized_news = None
     if args.all or args.news:
-        categorized_news = run_news_pipeline(days=args.days)
+        categorized_news = run_news_pipeline(
+            days=args.days,
+            conditional=False if args.full_fetch else None,
+            stream=args.stream,
+            incremental=args.incremental
+        )
         
     if args.all or args.arb:
+        http_cache.configure(enabled=False if args.no_cache else None, max_age=args.max_age)
+        if args.snapshot:
+            set_snapshot_mode(True)
         run_arb_pipeline()
         
     print("\n>>> Generating Unified Intelligence Report...")
-    report_path = generate_unified_report(categorized_news, include_arb=(args.all or args.arb))
+    report_path = generate_unified_report(categorized_news, include_arb=(args.all or args.arb), html=args.html)
     
     if report_path:
         print(f"[OK] Report generated: {report_path}")
         if args.mail:
             print(">>> Sending report via email...")
             try:
+                from app.core.mailer import send_report_email
                 send_report_email(report_path)
                 print("[SUCCESS] Email sent successfully.")
             except Exception as e: